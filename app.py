@@ -6,9 +6,16 @@ Example:
 
 
 import os
+import re
+import hmac
+import json
 import threading
 import logging
+import urllib.request
 from datetime import datetime, timedelta, time
+from typing import Optional
+from urllib.error import URLError
+from urllib.parse import urlparse
 
 from slack_bolt.adapter.flask import SlackRequestHandler
 from flask import Flask, request
@@ -16,9 +23,12 @@ from flask import Flask, request
 from pytz import timezone
 
 from client.slack_client import SlackClient
-from client.aws_client import EC2Client, IAMClient
+from client.aws_client import EC2Client, IAMClient, parse_ec2_state_change_event
+from client.instance_info import InstanceInfo
 from client.psql_client import PSQLClient
 from client.instance_usage_manager import InstanceUsageManager
+from client.instance_transition_watcher import InstanceTransitionWatcher
+from client.usage_intervals import get_quota_deadline
 
 
 # Set up a root logger
@@ -31,9 +41,37 @@ logging.basicConfig(
 ec2_client = EC2Client()
 iam_client = IAMClient()
 slack_client = SlackClient()
-psql_client = PSQLClient()
+psql_client = PSQLClient(ec2_client=ec2_client)  # 인스턴스 정보 캐시 공유
 instance_usage_manager = InstanceUsageManager()
 
+
+def notify_instance_transition(
+    slack_id: str,
+    target_state: str,
+    instance_info_dict: dict[str, Optional[InstanceInfo]]
+) -> None:
+    '''상태 전환이 끝난 인스턴스들의 접속 정보를 사용자에게 DM으로 보냅니다.'''
+
+    title = {
+        'running': '인스턴스 시작이 완료되었습니다 🖥️',
+        'stopped': '인스턴스 중지가 완료되었습니다 🛌',
+    }[target_state]
+    lines = []
+
+    for instance_id, info in sorted(instance_info_dict.items()):
+        if info is None:
+            lines.append(f'- `{instance_id}` | 상태를 확인하지 못했습니다. `/show` 명령어로 확인해주세요 ⚠️')
+        else:
+            lines.append(
+                f"- `{info.name}` (`{instance_id}`) | Public IP: `{info.public_ip_address}`")
+
+    slack_client.send_dm(slack_id, '\n'.join([title, '', *lines]))
+
+
+# 요청 처리 스레드를 막지 않고 백그라운드에서 상태 전환 완료를 확인
+transition_watcher = InstanceTransitionWatcher(
+    ec2_client, notify=notify_instance_transition)
+
 app = Flask(__name__)
 slack_app = slack_client.app
 
@@ -88,7 +126,7 @@ def handle_show_command(ack, command) -> bool:
         return False
 
     # 인스턴스 상태 조회
-    instance_info_dict = ec2_client.get_instance_info(
+    instance_info_dict = ec2_client.get_cached_instance_info(
         user_owned_instance_list)
 
     if not instance_info_dict:
@@ -106,8 +144,8 @@ def handle_show_command(ack, command) -> bool:
 
     for k, v in instance_info_dict.items():
         instance_info_str_list.append(
-            f'- `{v["name"]}` : {k} | {v["instance_state"]} | \
-Public IP Address - {v["public_ip_address"]} | Private IP Address - {v["private_ip_address"]}')
+            f'- `{v.name}` : {k} | {v.instance_state} | \
+Public IP Address - {v.public_ip_address} | Private IP Address - {v.private_ip_address}')
     msg += '\n'.join(instance_info_str_list)
 
     slack_client.send_dm(slack_id, msg)
@@ -169,7 +207,7 @@ def handle_stop_command(ack, command) -> bool:
         return False
 
     # 인스턴스 상태 조회
-    instance_info_dict = ec2_client.get_instance_info(
+    instance_info_dict = ec2_client.get_cached_instance_info(
         user_owned_instance_list)
     if not instance_info_dict:
         msg = '알 수 없는 이유로 인스턴스 상태 조회에 실패했습니다.'
@@ -181,7 +219,7 @@ def handle_stop_command(ack, command) -> bool:
     # `stopped` 상태로 만들 인스턴스가 하나라도 있는지 확인
     state_values = []
     for single_info_dict in instance_info_dict.values():
-        state_values.append(single_info_dict['instance_state'])
+        state_values.append(single_info_dict.instance_state)
 
     if not any(value == 'running' for value in state_values):
         msg = '이미 모든 인스턴스가 `stopped` 상태입니다.'
@@ -200,12 +238,14 @@ def handle_stop_command(ack, command) -> bool:
         return False
 
     logging.info('인스턴스 중지 | 인스턴스 ID: %s', user_owned_instance_list)
+    transition_watcher.watch(slack_id, user_owned_instance_list, 'stopped')
+    psql_client.delete_student_quota_deadline(student_id)
 
     # 성공 메시지 전송, 로그 데이터 적재
     now = datetime.now(timezone('Asia/Seoul'))
     remaining_tm = psql_client.get_remaining_usage_time(student_id)
     msg = f'''\
-모든 인스턴스를 성공적으로 중지했습니다 🛌
+모든 인스턴스에 중지를 요청했습니다. 중지가 완료되면 다시 알려드릴게요 🛌
 - 오늘의 잔여 할당량: `{remaining_tm.hour}시간 {remaining_tm.minute}분 {remaining_tm.second}초`
 
 _인스턴스 할당량 초기화는 매일 자정에 진행됩니다._\
@@ -272,7 +312,7 @@ def handle_start_command(ack, command) -> bool:
         return False
 
     # 인스턴스 상태 조회
-    instance_info_dict = ec2_client.get_instance_info(
+    instance_info_dict = ec2_client.get_cached_instance_info(
         user_owned_instance_list)
     if not instance_info_dict:
         msg = '알 수 없는 이유로 인스턴스 상태 조회에 실패했습니다.'
@@ -284,7 +324,7 @@ def handle_start_command(ack, command) -> bool:
     # `stopped` 상태로 만들 인스턴스가 하나라도 있는지 확인
     state_values = []
     for single_info_dict in instance_info_dict.values():
-        state_values.append(single_info_dict['instance_state'])
+        state_values.append(single_info_dict.instance_state)
 
     if not any(value == 'stopped' for value in state_values):
         msg = '이미 모든 인스턴스가 `running` 상태입니다.'
@@ -320,15 +360,33 @@ def handle_start_command(ack, command) -> bool:
         logging.error('인스턴스 시작 실패 | 인스턴스 ID: %s', user_owned_instance_list)
         return False
 
+    transition_watcher.watch(slack_id, user_owned_instance_list, 'running')
+
     # 성공 메시지 전송, 로그 데이터 적재
     now = datetime.now(timezone('Asia/Seoul'))
-    maximum_usage_time = now + timedelta(
-        hours=remaining_tm.hour,
-        minutes=remaining_tm.minute,
-        seconds=remaining_tm.second
-    )
+
+    # 할당량 소진 예정 시각에 인스턴스가 중지되도록 저장 (`tasks/quota_enforcer.py`)
+    # 이미 실행 중인 인스턴스가 있다면 사용 주기가 이어지므로, 할당량 업데이트 작업이 계산한 소진 예정 시각을 유지
+    if any(value in ('pending', 'running') for value in state_values):
+        quota_deadline = None
+    else:  # 지금부터 새로운 사용 주기 시작
+        quota_deadline = get_quota_deadline(now, remaining_tm, now)
+
+        if quota_deadline is not None:
+            psql_client.upsert_student_quota_deadline(student_id, quota_deadline)
+        else:  # 자정에 할당량이 초기화되기 전까지 소진되지 않음
+            psql_client.delete_student_quota_deadline(student_id)
+
+    if quota_deadline is not None:
+        maximum_usage_time = quota_deadline
+    else:
+        maximum_usage_time = now + timedelta(
+            hours=remaining_tm.hour,
+            minutes=remaining_tm.minute,
+            seconds=remaining_tm.second
+        )
     msg = f'''\
-인스턴스를 성공적으로 시작했습니다 🥳
+인스턴스 시작을 요청했습니다 🥳 시작이 완료되면 접속 정보(Public IP)를 다시 알려드릴게요.
 인스턴스를 사용한 다음에는 반드시 `/stop` 명령어로 종료해주세요 ⚠️
 
 - 오늘의 잔여 할당량: `{remaining_tm.hour}시간 {remaining_tm.minute}분 {remaining_tm.second}초`
@@ -588,3 +646,91 @@ def handle_slack_events():
     '''슬랙에서 송신된 이벤트 관련 request를 처리합니다.'''
 
     return slack_req_handler.handle(request)
+
+
+def confirm_sns_subscription(subscribe_url: str) -> bool:
+    '''SNS 구독 확인 URL을 호출합니다. AWS SNS의 URL이 아니라면 호출하지 않습니다.'''
+
+    parsed_url = urlparse(subscribe_url)
+
+    if parsed_url.scheme != 'https' or not re.fullmatch(
+            r'sns\.[a-z0-9-]+\.amazonaws\.com', parsed_url.hostname or ''):
+        logging.error('올바르지 않은 SNS 구독 확인 URL | %s', subscribe_url)
+
+        return False
+
+    try:
+        with urllib.request.urlopen(subscribe_url, timeout=10):
+            pass
+    except URLError as e:
+        logging.error('SNS 구독 확인 실패 | %s | %s', subscribe_url, e)
+
+        return False
+
+    logging.info('SNS 구독 확인 완료 | %s', subscribe_url)
+
+    return True
+
+
+@app.route('/ec2/events', methods=['POST'])
+def handle_ec2_events():
+    '''EventBridge(API destination) 또는 SNS로 전달된 EC2 인스턴스 상태 변경 이벤트를 처리합니다.
+
+    이벤트는 인스턴스 정보 캐시와 `instance_inventory` 테이블에 반영되며, 이미 더 최신의 정보가 반영된 이벤트는 무시됩니다.
+    요청에는 `AWS_MANAGER_EC2_EVENT_TOKEN` 환경변수의 값이 `X-AWS-Manager-Token` 헤더 또는 `token` 쿼리 파라미터로 포함되어야 하며,
+    환경변수가 설정되지 않았다면 모든 요청을 거부합니다.
+
+    Example:
+        $ curl -X POST -H 'X-AWS-Manager-Token: ...' -d @event.json http://127.0.0.1:4202/ec2/events
+    '''
+
+    token = os.getenv('AWS_MANAGER_EC2_EVENT_TOKEN', '')
+    request_token = request.headers.get('X-AWS-Manager-Token') \
+        or request.args.get('token', '')
+
+    if not token or not hmac.compare_digest(request_token.encode(), token.encode()):
+        logging.info('인증되지 않은 EC2 이벤트 요청 | %s', request.remote_addr)
+
+        return 'Forbidden', 403
+
+    payload = request.get_json(force=True, silent=True)
+
+    if isinstance(payload, dict) and payload.get('Type') == 'SubscriptionConfirmation':
+        if not confirm_sns_subscription(payload.get('SubscribeURL', '')):
+            return 'Bad Gateway', 502
+
+        return 'OK', 200
+
+    if isinstance(payload, dict) and payload.get('Type') == 'Notification':
+        try:
+            payload = json.loads(payload['Message'])  # SNS 메시지에 담긴 EventBridge 이벤트
+        except (KeyError, TypeError, ValueError):
+            payload = None
+
+    # 녹화된 이벤트들을 한 번에 전송할 수 있도록 이벤트 목록도 허용
+    events = payload if isinstance(payload, list) else [payload]
+
+    if not all(isinstance(event, dict) for event in events):
+        return 'Bad Request', 400
+
+    applied_cnt, ignored_cnt = 0, 0
+
+    for event in events:
+        state_change = parse_ec2_state_change_event(event)
+
+        if state_change is None:
+            logging.info('EC2 상태 변경 이벤트가 아님 | %s', event.get('detail-type'))
+            ignored_cnt += 1
+
+            continue
+
+        psql_client.update_instance_inventory_state(*state_change)
+
+        if ec2_client.apply_state_change(*state_change):
+            applied_cnt += 1
+        else:
+            ignored_cnt += 1
+
+        logging.info('EC2 상태 변경 이벤트 수신 | %s | %s | %s', *state_change)
+
+    return {'applied': applied_cnt, 'ignored': ignored_cnt}, 200
@@ -2,49 +2,435 @@
 
 
 import os
+import re
+import time
+import queue
 import logging
-from datetime import datetime
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional
 
-import boto3
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
+
+from client.aws_rate_limiter import get_caller_rate_limiter
+from client.aws_session import get_client
+from client.instance_info import InstanceInfo, InventoryRecord
+from client.inventory_snapshot import InventorySnapshot
+
+
+def get_error_code(e: Exception) -> str:
+    '''API 호출 오류의 오류 코드를 반환합니다. 응답을 받지 못한 경우(e.g. 네트워크 오류)에는 예외 클래스 이름을 반환합니다.'''
+
+    if isinstance(e, ClientError):
+        return e.response.get('Error', {}).get('Code')
+
+    return type(e).__name__
+
+
+EC2_STATE_CHANGE_DETAIL_TYPE = 'EC2 Instance State-change Notification'
+
+
+def parse_ec2_state_change_event(event: dict) -> Optional[tuple[str, str, datetime]]:
+    '''EventBridge의 EC2 인스턴스 상태 변경 이벤트에서 인스턴스 ID, 바뀐 상태, 발생 시각(UTC)을 추출합니다.
+
+    상태 변경 이벤트가 아니거나 형식이 올바르지 않으면 None을 반환합니다.
+    '''
+
+    if event.get('source') != 'aws.ec2' \
+            or event.get('detail-type') != EC2_STATE_CHANGE_DETAIL_TYPE:
+        return None
+
+    try:
+        changed_at = datetime.strptime(event['time'], '%Y-%m-%dT%H:%M:%SZ')
+
+        return (
+            event['detail']['instance-id'],
+            event['detail']['state'],
+            changed_at.replace(tzinfo=timezone.utc),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class DescribeBatcher:
+    '''짧은 시간 동안 동시에 들어온 인스턴스 정보 조회 요청들을 하나의 API 호출로 합칩니다.
+
+    진행 중인 조회가 없다면 요청을 바로 조회하므로, 동시에 들어온 요청이 없을 때는 지연이 추가되지 않습니다.
+    조회가 진행 중일 때 들어온 요청은 `window`초 동안 다른 요청을 기다린 후, 요청된 모든 인스턴스 ID를 한 번에 조회합니다.
+    각 요청은 조회 결과 중 자신이 요청한 인스턴스의 정보만 반환받습니다.
+
+    Args:
+        describe: 인스턴스 ID 목록을 받아 `{instance_id: 인스턴스 정보}`를 반환하고, 실패 시 None을 반환하는 함수입니다.
+        window (float): 다른 요청을 기다리는 시간(초)입니다.
+    '''
+
+    class _Batch:
+        def __init__(self) -> None:
+            self.instance_ids: set[str] = set()
+            self.result: Optional[dict] = None
+            self.done = threading.Event()
+
+    def __init__(
+        self,
+        describe: Callable[[list[str]], Optional[dict]],
+        window: float = 0.05
+    ) -> None:
+        self.describe = describe
+        self.window = window
+        self._pending: Optional[DescribeBatcher._Batch] = None
+        self._in_flight_cnt = 0
+        self._lock = threading.Lock()
+
+    def get(self, instance_ids: Iterable[str]) -> Optional[dict]:
+        '''인스턴스 정보를 조회합니다. 조회에 실패하면 같은 조회에 합쳐진 모든 요청이 None을 반환합니다.'''
+
+        instance_ids = set(instance_ids)
+
+        if not instance_ids:
+            return {}
+
+        with self._lock:
+            batch = self._pending
+            is_leader = batch is None
+
+            if is_leader:
+                batch = self._pending = self._Batch()
+                # 다른 조회가 진행 중일 때만 동시에 들어오는 요청들을 기다림
+                should_wait = self._in_flight_cnt > 0
+
+            batch.instance_ids.update(instance_ids)
+
+        if is_leader:
+            if should_wait:
+                time.sleep(self.window)
+
+            with self._lock:  # 이후에 들어온 요청은 다음 조회에 합쳐짐
+                self._pending = None
+                self._in_flight_cnt += 1
+
+            try:
+                batch.result = self.describe(sorted(batch.instance_ids))
+            finally:
+                with self._lock:
+                    self._in_flight_cnt -= 1
+
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.result is None:
+            return None
+
+        return {
+            instance_id: batch.result[instance_id]
+            for instance_id in instance_ids
+            if instance_id in batch.result
+        }
+
+
+class InstanceInventoryCache:
+    '''EC2 인스턴스 정보(state, Name 태그, IP 주소)를 캐싱합니다.
+
+    전체 인스턴스 정보는 `ttl`초 동안 유효하며, 만료된 이후 처음 들어온 요청에서 한 번만 갱신됩니다.
+    갱신 중에 들어온 다른 요청들은 갱신이 끝날 때까지 기다린 후 그 결과를 함께 사용합니다(single-flight).
+    `invalidate()`된 인스턴스는 다음 조회 시 해당 인스턴스의 정보만 다시 조회하며,
+    이 조회는 잠금 없이 수행되므로 동시에 들어온 다른 요청의 조회와 합쳐질 수 있습니다(`DescribeBatcher`).
+    `apply_state_change()`로 상태 변경 이벤트를 반영하면, AWS API 호출 없이 인스턴스 상태를 최신으로 유지할 수 있습니다.
+
+    `snapshot`이 주어지면 여러 프로세스(gunicorn 워커)가 하나의 스냅샷을 공유합니다.
+    각 프로세스는 스냅샷이 바뀌었을 때만 스냅샷을 다시 읽으며, 전체 갱신은 스냅샷 갱신 잠금을 얻은 하나의 프로세스만 수행합니다.
+
+    Args:
+        describe_instances: `EC2Client.find_instances()`와 같이 조건에 맞는 인스턴스별 정보를 반환하는 함수입니다.
+        ttl (float): 전체 인스턴스 정보의 유효 시간(초)입니다.
+        snapshot (InventorySnapshot, optional): 여러 프로세스가 공유할 스냅샷입니다.
+    '''
+
+    # 삭제(중)인 인스턴스는 캐싱하지 않음
+    LIVE_STATES = ('pending', 'running', 'stopping', 'stopped')
+
+    def __init__(
+        self,
+        describe_instances: Callable[..., Optional[dict[str, InstanceInfo]]],
+        ttl: float,
+        snapshot: Optional[InventorySnapshot] = None
+    ) -> None:
+        self.describe_instances = describe_instances
+        self.ttl = ttl
+        self.snapshot = snapshot
+        self._instances: dict[str, InstanceInfo] = {}
+        self._refreshed_at: Optional[float] = None
+        self._invalidated_ids: set[str] = set()
+        self._observed_at: dict[str, float] = {}  # 마지막 전체 갱신 이후 개별적으로 관측된 인스턴스
+        self._snapshot_version: Optional[int] = None
+        self._refresh_lock = threading.RLock()
+        self._invalidate_lock = threading.Lock()
+
+    def _is_expired(self) -> bool:
+        return self._refreshed_at is None \
+            or time.time() - self._refreshed_at > self.ttl
+
+    def _sync_from_snapshot(self) -> None:
+        '''스냅샷이 바뀌었다면 캐시를 스냅샷의 내용으로 교체합니다.'''
+
+        if self.snapshot.get_version()[0] == self._snapshot_version:
+            return
+
+        version, refreshed_at, instances, invalidated_ids = self.snapshot.read()
+
+        self._instances = instances
+        self._refreshed_at = refreshed_at
+        self._snapshot_version = version
+
+        with self._invalidate_lock:
+            self._invalidated_ids = invalidated_ids
+
+    def _refresh(
+        self,
+        instance_ids: Optional[set[str]] = None
+    ) -> bool:
+        '''인스턴스 정보를 조회하여 캐시(및 스냅샷)에 반영합니다.
+
+        Args:
+            instance_ids: 다시 조회할 인스턴스 ID입니다. None이면 전체 인스턴스 정보를 조회합니다.
+
+        Returns:
+            AWS API 호출에 실패하면 False를 반환합니다.
+        '''
+
+        fetched_at = time.time()
+
+        with self._invalidate_lock:
+            # 조회 이후에 `invalidate()`된 인스턴스는 다시 조회가 필요한 상태로 남겨둠
+            cleared_ids = set(self._invalidated_ids if instance_ids is None else instance_ids)
+
+        if instance_ids is None:
+            instances = self.describe_instances(states=self.LIVE_STATES)
+        else:
+            instances = self.describe_instances(instance_ids=instance_ids)
+
+        if instances is None:
+            return False
+
+        with self._refresh_lock:
+            if self.snapshot is not None:
+                self.snapshot.write(instances, fetched_at, refreshed_ids=instance_ids)
+                self._sync_from_snapshot()
+
+                return True
+
+            if instance_ids is None:
+                self._instances = instances
+                self._refreshed_at = fetched_at
+                self._observed_at = {}
+            else:
+                for instance_id in instance_ids:
+                    observed_at = self._observed_at.get(instance_id, self._refreshed_at or 0)
+
+                    # 조회 중에 더 최신 정보(상태 변경 이벤트, 전체 갱신)가 반영된 인스턴스는 덮어쓰지 않음
+                    if observed_at > fetched_at:
+                        cleared_ids.discard(instance_id)
+                        continue
+
+                    self._instances.pop(instance_id, None)
+                    self._observed_at[instance_id] = fetched_at
+
+                    if instance_id in instances:
+                        self._instances[instance_id] = instances[instance_id]
+
+            with self._invalidate_lock:
+                self._invalidated_ids -= cleared_ids
+
+        return True
+
+    def _refresh_all(self) -> bool:
+        '''전체 인스턴스 정보를 갱신합니다. 스냅샷을 공유하는 경우 하나의 프로세스만 갱신합니다.'''
+
+        if self.snapshot is None:
+            return self._refresh()
+
+        with self.snapshot.refresh_lock():
+            # 잠금을 기다리는 동안 다른 프로세스가 이미 갱신했을 수 있음
+            self._sync_from_snapshot()
+
+            if not self._is_expired():
+                return True
+
+            return self._refresh()
+
+    def get(
+        self,
+        instance_ids: Optional[Iterable[str]] = None
+    ) -> Optional[dict[str, InstanceInfo]]:
+        '''인스턴스 정보를 반환합니다. AWS API 호출에 실패하면 None을 반환합니다.'''
+
+        if instance_ids is not None:
+            instance_ids = list(instance_ids)
+
+        with self._refresh_lock:
+            if self.snapshot is not None:
+                self._sync_from_snapshot()
+
+            if self._is_expired():
+                if not self._refresh_all():
+                    return None
+
+                invalidated_ids = set()
+            else:
+                with self._invalidate_lock:
+                    invalidated_ids = set(self._invalidated_ids)
+
+                if instance_ids is not None:
+                    invalidated_ids &= set(instance_ids)
+
+        # 동시에 들어온 다른 요청의 조회와 합쳐질 수 있도록 잠금 없이 조회
+        if invalidated_ids and not self._refresh(invalidated_ids):
+            return None
+
+        with self._refresh_lock:
+            if instance_ids is None:
+                return dict(self._instances)
+
+            return {
+                instance_id: self._instances[instance_id]
+                for instance_id in instance_ids
+                if instance_id in self._instances
+            }
+
+    def apply_state_change(
+        self,
+        instance_id: str,
+        instance_state: str,
+        changed_at: float
+    ) -> bool:
+        '''인스턴스 상태 변경 이벤트를 캐시(및 스냅샷)에 반영합니다.
+
+        인스턴스가 시작되면 IP 주소가 바뀌므로, 다음 조회 시 해당 인스턴스의 정보만 다시 조회합니다.
+        같은 초에 관측된 정보가 있어 선후 관계를 알 수 없는 경우와 새로 발견된 인스턴스도 마찬가지입니다.
+
+        Args:
+            instance_id: 상태가 바뀐 인스턴스 ID입니다.
+            instance_state: 바뀐 상태입니다. (e.g. `running`)
+            changed_at: 상태가 바뀐 시각(UNIX timestamp, 초 단위)입니다.
+
+        Returns:
+            이미 더 최신의 정보가 반영되어 있어 이벤트를 무시한 경우 False를 반환합니다.
+        '''
+
+        live = instance_state in self.LIVE_STATES
+        refetch = instance_state == 'running'
+
+        with self._refresh_lock:
+            if self.snapshot is not None:
+                applied = self.snapshot.apply_state_change(
+                    instance_id, instance_state if live else None, changed_at, refetch)
+                self._sync_from_snapshot()
+
+                return applied
+
+            observed_at = self._observed_at.get(instance_id, self._refreshed_at or 0)
+
+            if changed_at + 1 <= observed_at:
+                return False
+
+            if not live:
+                self._instances.pop(instance_id, None)
+                self._observed_at[instance_id] = max(observed_at, changed_at)
+
+                return True
+
+            if instance_id not in self._instances or changed_at <= observed_at:
+                refetch = True
+
+            self._instances[instance_id] = self._instances.get(
+                instance_id, InstanceInfo(instance_state, None, None, None)
+            )._replace(instance_state=instance_state)
+            self._observed_at[instance_id] = max(observed_at, changed_at)
+
+            if refetch:
+                with self._invalidate_lock:
+                    self._invalidated_ids.add(instance_id)
+
+        return True
+
+    def invalidate(self, instance_ids: Iterable[str]) -> None:
+        '''인스턴스의 상태가 바뀌었으므로, 다음 조회 시 정보를 다시 조회하도록 표시합니다.'''
+
+        instance_ids = list(instance_ids)
+
+        if self.snapshot is not None:
+            # 다른 프로세스의 캐시도 다음 조회 시 스냅샷을 다시 읽음
+            self.snapshot.invalidate(instance_ids)
+
+        with self._invalidate_lock:
+            self._invalidated_ids.update(instance_ids)
 
 
 class EC2Client:
-    '''메인 EC2 클라이언트입니다.'''
+    '''메인 EC2 클라이언트입니다.
+
+    인스턴스 정보 캐시의 유효 시간(초)은 `AWS_MANAGER_INVENTORY_TTL` 환경변수로 조정합니다. (기본값 30)
+    `AWS_MANAGER_INVENTORY_SNAPSHOT_PATH` 환경변수가 설정되면 해당 경로의 스냅샷을 다른 프로세스와 공유합니다.
+    다른 조회가 진행 중일 때 인스턴스 ID로 정보를 조회하는 요청들을 합쳐서 조회하기 위해 기다리는 시간(초)은
+    `AWS_MANAGER_DESCRIBE_BATCH_WINDOW` 환경변수로 조정합니다. (기본값 0.05)
+    '''
+
+    MAX_FILTER_VALUES = 200
+    MAX_STATUS_INSTANCE_IDS = 100
+    EIP_NAME_TAG = 'EIP for EC2 instance'
+    BATCH_CHUNK_SIZE = 50
+    BATCH_MAX_WORKERS = 8
+    # 요청에 포함된 일부 인스턴스로 인해 요청 전체가 실패할 때의 오류 코드
+    INSTANCE_ERROR_CODES = {
+        'IncorrectInstanceState',
+        'InsufficientInstanceCapacity',
+        'InvalidInstanceID.Malformed',
+        'InvalidInstanceID.NotFound',
+        'UnsupportedOperation',
+    }
 
     def __init__(self):
-        self.client = boto3.client(
-            'ec2',
-            aws_access_key_id=os.getenv('AWS_MANAGER_AWS_ACCESS_KEY'),
-            aws_secret_access_key=os.getenv(
-                'AWS_MANAGER_AWS_SECRET_ACCESS_KEY'),
-            region_name='ap-northeast-2',
+        self.describe_batcher = DescribeBatcher(
+            self._describe_instances_by_id,
+            window=float(os.getenv('AWS_MANAGER_DESCRIBE_BATCH_WINDOW', '0.05'))
         )
+        snapshot_path = os.getenv('AWS_MANAGER_INVENTORY_SNAPSHOT_PATH')
+        self.inventory = InstanceInventoryCache(
+            self.find_instances,
+            ttl=float(os.getenv('AWS_MANAGER_INVENTORY_TTL', '30')),
+            snapshot=InventorySnapshot(snapshot_path) if snapshot_path else None
+        )
+
+    @property
+    def client(self):
+        '''공유되는 `ec2` 클라이언트입니다. 처음 사용될 때 생성됩니다.'''
+
+        return get_client('ec2')
 
     def get_instance_info(
         self,
         instance_ids: list[str]
-    ) -> Optional[dict[str, dict[str, str]]]:
+    ) -> Optional[dict[str, InstanceInfo]]:
         '''AWS API를 호출하여 인스턴스 state, Name 태그 정보 등을 반환합니다.
 
         Returns:
-          각 인스턴스에 대응되는 다양한 정보들이 key-value 형태로 저장됩니다.
+          각 인스턴스 ID에 대응되는 `InstanceInfo`가 저장됩니다.
           예시는 아래와 같습니다.
 
           {
-            'i-123456789': {
-                'instance_state': 'stopped',
-                'name': 'hongju-spark-master1',
-                'public_ip_address': '34.1.2.3',
-                'private_ip_address': '10.0.0.2'
-            },
-            'i-987651231': {
-                'instance_state': 'running',
-                'name': 'hongju-spark-master2',
-                'public_ip_address': '34.1.2.4',
-                'private_ip_address': '10.0.0.3'
-            }
+            'i-123456789': InstanceInfo(
+                instance_state='stopped',
+                name='hongju-spark-master1',
+                public_ip_address=None,
+                private_ip_address='10.0.0.2'
+            ),
+            'i-987651231': InstanceInfo(
+                instance_state='running',
+                name='hongju-spark-master2',
+                public_ip_address='34.1.2.4',
+                private_ip_address='10.0.0.3'
+            )
           }
         '''
 
@@ -52,7 +438,7 @@ class EC2Client:
             resp_dict = self.client.describe_instances(
                 InstanceIds=instance_ids
             )
-        except ClientError as e:
+        except (ClientError, BotoCoreError) as e:
             logging.error(
                 '인스턴스 상태, Name 태그 정보 API 호출 실패: %s | 인스턴스 ID 목록: %s',
                 instance_ids,
@@ -65,107 +451,317 @@ class EC2Client:
 
         for reservation in resp_dict['Reservations']:
             for instance in reservation['Instances']:
-                instance_id = instance['InstanceId']
-                state = instance['State']['Name']
-                name_tag_value = None
-                public_ip = None
-                private_ip = None
+                instance_state_name_dict[instance['InstanceId']] = \
+                    self._parse_instance_info(instance)
 
-                # 'Name' 태그 값 파싱
-                try:
-                    for tag in instance['Tags']:
-                        if 'Name' in tag.values():
-                            name_tag_value = tag['Value']
-                            break
-                except KeyError:
-                    logging.info('인스턴스에 태그가 없음 (`Tags`): %s', instance.keys())
-
-                # Public IP 주소값 파싱
-                try:
-                    public_ip = instance['PublicIpAddress']
-                except KeyError:
-                    logging.info(
-                        '인스턴스에 Public IP 주소가 없음 (`Tags`): %s', instance.keys())
+        return instance_state_name_dict
 
-                # Private IP 주소값 파싱
-                try:
-                    private_ip = instance['PrivateIpAddress']
-                except KeyError:
-                    logging.info(
-                        '인스턴스에 Private IP 주소가 없음 (`Tags`): %s', instance.keys())
-
-                # 파싱 정보 할당
-                instance_state_name_dict[instance_id] = {
-                    'instance_state': state,
-                    'name': name_tag_value,
-                    'public_ip_address': public_ip,
-                    'private_ip_address': private_ip
-                }
+    def _parse_instance_info(self, instance: dict) -> InstanceInfo:
+        '''`describe_instances()` 응답의 인스턴스 정보에서 state, Name 태그, IP 주소 정보를 추출합니다.'''
+
+        return InstanceInfo(
+            instance['State']['Name'],
+            next(
+                (tag['Value'] for tag in instance.get('Tags', ()) if tag['Key'] == 'Name'),
+                None
+            ),
+            instance.get('PublicIpAddress'),  # 중지된 인스턴스는 Public IP 주소가 없음
+            instance.get('PrivateIpAddress'),
+        )
 
-        return instance_state_name_dict
+    def _parse_inventory_info(self, instance: dict) -> InventoryRecord:
+        '''`_parse_instance_info()`의 정보에 더해 시작 시각과 마지막 상태 변경 시각을 추출합니다.'''
 
-    def start_instance(
+        # e.g. 'User initiated (2024-05-01 09:00:00 GMT)', 실행 중인 인스턴스는 빈 문자열
+        matched = re.search(
+            r'\((\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) GMT\)',
+            instance.get('StateTransitionReason') or ''
+        )
+        state_transition_time = None
+
+        if matched:
+            state_transition_time = datetime.strptime(
+                matched.group(1), '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+
+        return InventoryRecord(
+            *self._parse_instance_info(instance),
+            instance.get('LaunchTime'),
+            state_transition_time
+        )
+
+    def _describe_instances(
         self,
-        instance_ids: list[str]
-    ) -> bool:
-        '''EC2 인스턴스를 시작합니다.'''
+        parse_instance: Optional[Callable[[dict], tuple]] = None,
+        **kwargs
+    ) -> Optional[dict[str, tuple]]:
+        '''`describe_instances()`의 모든 페이지를 조회하여 인스턴스별 정보를 반환합니다.
+
+        Args:
+            parse_instance: 인스턴스 정보를 추출할 함수입니다. (기본값: `_parse_instance_info()`)
+            kwargs: `describe_instances()`에 그대로 전달되는 인자입니다. (e.g. `Filters`)
+        '''
+
+        parse_instance = parse_instance or self._parse_instance_info
+
+        instance_info_dict = {}
+        paginator = self.client.get_paginator('describe_instances')
 
         try:
-            self.client.start_instances(
-                InstanceIds=instance_ids,
-                DryRun=False
-            )
+            for page in paginator.paginate(**kwargs):
+                for reservation in page['Reservations']:
+                    for instance in reservation['Instances']:
+                        instance_info_dict[instance['InstanceId']] = \
+                            parse_instance(instance)
+        except (ClientError, BotoCoreError) as e:
+            logging.error('인스턴스 정보 조회 API 호출 실패 | %s | %s', kwargs, e)
+
+            return None
+
+        return instance_info_dict
+
+    def get_cached_instance_info(
+        self,
+        instance_ids: Optional[Iterable[str]] = None
+    ) -> Optional[dict[str, InstanceInfo]]:
+        '''캐싱된 인스턴스 정보를 반환합니다. 반환 형식은 `get_instance_info()`와 같습니다.
+
+        존재하지 않는 인스턴스는 결과에 포함되지 않으며, `instance_ids`가 없으면 모든 인스턴스의 정보를 반환합니다.
+        '''
+
+        return self.inventory.get(instance_ids)
+
+    def apply_state_change(
+        self,
+        instance_id: str,
+        instance_state: str,
+        changed_at: datetime
+    ) -> bool:
+        '''인스턴스 상태 변경 이벤트를 인스턴스 정보 캐시에 반영합니다. 오래된 이벤트라서 무시한 경우 False를 반환합니다.'''
+
+        return self.inventory.apply_state_change(
+            instance_id, instance_state, changed_at.timestamp())
+
+    def _change_instance_states(
+        self,
+        operation: str,
+        instance_ids: Iterable[str]
+    ) -> dict[str, Optional[str]]:
+        '''인스턴스들을 시작/중지합니다.
+
+        인스턴스 ID 목록을 `BATCH_CHUNK_SIZE`개씩 나누어 최대 `BATCH_MAX_WORKERS`개의 스레드에서 동시에 호출합니다.
+        호출 제한(throttling)에 걸린 요청은 botocore가 다시 시도하며,
+        일부 인스턴스 때문에 요청 전체가 실패한 경우(e.g. 삭제된 인스턴스)에는 요청을 절반씩 나누어 다시 호출하여 해당 인스턴스만 제외합니다.
+
+        Args:
+            operation: `start_instances` 또는 `stop_instances`입니다.
+            instance_ids: 시작/중지할 인스턴스 ID 목록입니다.
+
+        Returns:
+            `{instance_id: 오류 코드}` 형태로 반환합니다. 성공한 인스턴스의 오류 코드는 None입니다.
+        '''
+
+        api = getattr(self.client, operation)
+
+        def call_api(chunk: list[str]) -> dict[str, Optional[str]]:
+            try:
+                api(InstanceIds=chunk, DryRun=False)
+
+                return dict.fromkeys(chunk)
+            except (ClientError, BotoCoreError) as e:
+                error_code = get_error_code(e)
+
+                if error_code in self.INSTANCE_ERROR_CODES and len(chunk) > 1:
+                    mid = len(chunk) // 2
+
+                    return {**call_api(chunk[:mid]), **call_api(chunk[mid:])}
 
-            return True
-        except ClientError as e:
             logging.error(
-                '인스턴스 시작 API (`start_instances()`) 호출 실패 | 인스턴스 ID: %s | %s',
-                instance_ids,
-                e
+                '인스턴스 %s API 호출 실패 | 인스턴스 ID: %s | %s',
+                operation,
+                chunk,
+                error_code
             )
 
-            return False
+            return dict.fromkeys(chunk, error_code)
 
-    def stop_instance(
+        instance_ids = list(dict.fromkeys(instance_ids))  # 중복 제거
+        chunks = [
+            instance_ids[i:i + self.BATCH_CHUNK_SIZE]
+            for i in range(0, len(instance_ids), self.BATCH_CHUNK_SIZE)
+        ]
+        results = {}
+
+        with ThreadPoolExecutor(max_workers=self.BATCH_MAX_WORKERS) as executor:
+            for chunk_results in executor.map(call_api, chunks):
+                results.update(chunk_results)
+
+        changed_ids = [i for i, error_code in results.items() if error_code is None]
+
+        if changed_ids:
+            self.inventory.invalidate(changed_ids)
+
+        return results
+
+    def start_instances(
+        self,
+        instance_ids: Iterable[str]
+    ) -> dict[str, Optional[str]]:
+        '''EC2 인스턴스들을 시작하고, 인스턴스별 결과(실패 시 오류 코드, 성공 시 None)를 반환합니다.'''
+
+        return self._change_instance_states('start_instances', instance_ids)
+
+    def stop_instances(
+        self,
+        instance_ids: Iterable[str]
+    ) -> dict[str, Optional[str]]:
+        '''EC2 인스턴스들을 중지하고, 인스턴스별 결과(실패 시 오류 코드, 성공 시 None)를 반환합니다.'''
+
+        return self._change_instance_states('stop_instances', instance_ids)
+
+    def start_instance(
         self,
         instance_ids: list[str]
     ) -> bool:
-        '''EC2 인스턴스를 중지합니다.'''
+        '''EC2 인스턴스를 시작합니다. 모든 인스턴스가 시작되었다면 True를 반환합니다.'''
 
-        try:
-            self.client.stop_instances(
-                InstanceIds=instance_ids,
-                DryRun=False
-            )
+        return not any(self.start_instances(instance_ids).values())
 
-            return True
-        except ClientError as e:
-            logging.error(
-                '인스턴스 중지 API (`stop_instances()`) 호출 실패 | 인스턴스 ID: %s | %s',
-                instance_ids,
-                e
-            )
+    def stop_instance(
+        self,
+        instance_ids: list[str]
+    ) -> bool:
+        '''EC2 인스턴스를 중지합니다. 모든 인스턴스가 중지되었다면 True를 반환합니다.'''
 
-            return False
+        return not any(self.stop_instances(instance_ids).values())
 
     def get_live_instance_id_list(self, state: list[str]) -> list[str]:
         '''시작/중지 상태인 모든 EC2 인스턴스의 ID가 담긴 리스트를 반환합니다.'''
 
-        instance_id_list = []
-        response = self.client.describe_instances(Filters=[
-            {
-                'Name': 'instance-state-name',
-                'Values': state,
-            },
-        ])
-        reservations = response['Reservations']
+        instance_id_set = self.get_live_instance_id_set(state)
 
-        for reservation in reservations:
-            for instance in reservation['Instances']:
-                instance_id = instance['InstanceId']
-                instance_id_list.append(instance_id)
+        if instance_id_set is None:  # 조회 실패
+            return []
+
+        return sorted(instance_id_set)
+
+    def get_live_instance_id_set(self, state: Iterable[str]) -> Optional[set[str]]:
+        '''해당 상태인 모든 EC2 인스턴스의 ID가 담긴 집합을 반환합니다. 조회 실패 시 None을 반환합니다.'''
+
+        instance_info_dict = self.find_instances(states=state)
+
+        if instance_info_dict is None:
+            return None
+
+        return set(instance_info_dict)
+
+    def get_instance_states(
+        self,
+        instance_ids: Iterable[str]
+    ) -> Optional[dict[str, str]]:
+        '''`describe_instance_status()`로 인스턴스들의 현재 상태를 조회합니다.
+
+        인스턴스 상태만 필요한 경우 `describe_instances()`보다 응답이 가볍습니다.
+        ID 목록은 `MAX_STATUS_INSTANCE_IDS`개씩 나누어 조회합니다.
+
+        Returns:
+            `{instance_id: 상태}` 형태로 반환합니다. 조회 실패 시 None을 반환합니다.
+        '''
+
+        instance_ids = list(instance_ids)
+        instance_states = {}
+        paginator = self.client.get_paginator('describe_instance_status')
+
+        try:
+            for i in range(0, len(instance_ids), self.MAX_STATUS_INSTANCE_IDS):
+                pages = paginator.paginate(
+                    InstanceIds=instance_ids[i:i + self.MAX_STATUS_INSTANCE_IDS],
+                    IncludeAllInstances=True,  # 실행 중이 아닌 인스턴스도 포함
+                )
+
+                for page in pages:
+                    for status in page['InstanceStatuses']:
+                        instance_states[status['InstanceId']] = \
+                            status['InstanceState']['Name']
+        except (ClientError, BotoCoreError) as e:
+            logging.error('인스턴스 상태 조회 API 호출 실패 | %s | %s', instance_ids, e)
+
+            return None
+
+        return instance_states
+
+    def find_instances(
+        self,
+        instance_ids: Optional[Iterable[str]] = None,
+        states: Optional[Iterable[str]] = None,
+        names: Optional[Iterable[str]] = None
+    ) -> Optional[dict[str, InstanceInfo]]:
+        '''조건에 맞는 인스턴스들의 정보를 반환합니다.
+
+        조건은 `describe_instances()`의 필터로 전달되어 AWS 측에서 필터링되며, 모든 페이지의 결과를 조회합니다.
+        존재하지 않는 인스턴스 ID는 오류 없이 결과에서 제외됩니다.
+        인스턴스 ID만으로 조회하는 요청은 동시에 들어온 다른 요청과 합쳐서 한 번에 조회합니다.
+
+        Args:
+            instance_ids: 조회할 인스턴스 ID 목록입니다.
+            states: 조회할 인스턴스 상태 목록입니다. (e.g. `['running', 'stopped']`)
+            names: 조회할 인스턴스의 `Name` 태그 값 목록입니다.
+
+        Returns:
+            `{instance_id: InstanceInfo}` 형태로 반환합니다.
+            조회 실패 시 None을 반환합니다.
+        '''
+
+        filters = []
+
+        if states is not None:
+            filters.append({'Name': 'instance-state-name', 'Values': list(states)})
+
+        if names is not None:
+            filters.append({'Name': 'tag:Name', 'Values': list(names)})
+
+        if instance_ids is None:
+            return self._describe_instances(Filters=filters)
+
+        if not filters:
+            return self.describe_batcher.get(instance_ids)
+
+        return self._describe_instances_by_id(instance_ids, filters)
+
+    def _describe_instances_by_id(
+        self,
+        instance_ids: Iterable[str],
+        filters: Iterable[dict] = ()
+    ) -> Optional[dict[str, InstanceInfo]]:
+        '''인스턴스 ID 목록에 해당하는 인스턴스들 중 `filters` 조건에 맞는 인스턴스들의 정보를 반환합니다.'''
+
+        instance_ids = list(instance_ids)
+        instance_info_dict = {}
+
+        # 필터 하나에 지정할 수 있는 값의 개수가 제한되어 있으므로 나누어 조회
+        for i in range(0, len(instance_ids), self.MAX_FILTER_VALUES):
+            chunk_info_dict = self._describe_instances(Filters=[
+                *filters,
+                {
+                    'Name': 'instance-id',
+                    'Values': instance_ids[i:i + self.MAX_FILTER_VALUES],
+                },
+            ])
+
+            if chunk_info_dict is None:
+                return None
 
-        return instance_id_list
+            instance_info_dict.update(chunk_info_dict)
+
+        return instance_info_dict
+
+    def describe_inventory(self) -> Optional[dict[str, InventoryRecord]]:
+        '''`instance_inventory` 테이블에 적재할 전체 인스턴스의 정보를 조회합니다.
+
+        Returns:
+            `{instance_id: InventoryRecord}` 형태로 반환합니다. 조회 실패 시 None을 반환합니다.
+        '''
+
+        return self._describe_instances(parse_instance=self._parse_inventory_info)
 
     def allocate_eip_address(self, number_of_instance: int) -> list[str]:
         '''인스턴스의 갯수만큼 EIP 주소를 생성합니다.'''
@@ -181,7 +777,7 @@ class EC2Client:
                             'Tags': [
                                 {
                                     'Key': 'Name',
-                                    'Value': 'EIP for EC2 instance'
+                                    'Value': self.EIP_NAME_TAG
                                 },
                             ],
                         },
@@ -189,7 +785,7 @@ class EC2Client:
                 )
 
                 allocation_id_list.append(resp['AllocationId'])
-            except ClientError as e:
+            except (ClientError, BotoCoreError) as e:
                 logging.error(
                     'EIP allocation API(`allocate_address()`) 호출 실패 | %s',
                     e
@@ -210,7 +806,7 @@ class EC2Client:
                     AllocationId=allocation_id,
                     InstanceId=instance_id
                 )
-            except ClientError as e:
+            except (ClientError, BotoCoreError) as e:
                 logging.error(
                     'EIP associate API(`associate_address()`) 호출 실패 | \
 `AllocationId`: %s | `InstanceId`: %s | %s',
@@ -219,22 +815,109 @@ class EC2Client:
                     e
                 )
 
+    def reconcile_eip_addresses(
+        self,
+        instance_ids: Iterable[str]
+    ) -> Optional[dict[str, Optional[str]]]:
+        '''EIP 주소가 연결되지 않은 인스턴스에만 EIP 주소를 연결합니다.
+
+        `describe_addresses()`로 현재 연결 상태를 조회하여, 이미 EIP 주소가 연결된 인스턴스는 건너뜁니다.
+        연결되지 않은 채 남아있는 (이 모듈이 생성한) EIP 주소를 먼저 재사용하고, 부족한 만큼만 새로 생성합니다.
+        따라서 여러 번 실행해도 EIP 주소가 추가로 생성되지 않습니다.
+        생성/연결은 최대 `BATCH_MAX_WORKERS`개의 스레드에서 동시에 수행합니다.
+
+        Returns:
+            EIP 주소를 연결해야 했던 인스턴스별 결과를 `{instance_id: 오류 코드}` 형태로 반환합니다.
+            성공한 인스턴스의 오류 코드는 None입니다. 연결 상태 조회 실패 시 None을 반환합니다.
+        '''
+
+        try:
+            addresses = self.client.describe_addresses(
+                Filters=[{'Name': 'domain', 'Values': ['vpc']}]
+            )['Addresses']
+        except (ClientError, BotoCoreError) as e:
+            logging.error('EIP 주소 조회 API(`describe_addresses()`) 호출 실패 | %s', e)
+
+            return None
+
+        associated_ids = {a['InstanceId'] for a in addresses if a.get('InstanceId')}
+        # 다른 용도의 EIP 주소를 가져가지 않도록 이 모듈이 생성한 주소만 재사용
+        idle_allocation_ids = [
+            a['AllocationId'] for a in addresses
+            if not a.get('AssociationId')
+            and {'Key': 'Name', 'Value': self.EIP_NAME_TAG} in a.get('Tags', [])
+        ]
+        missing_ids = [
+            i for i in dict.fromkeys(instance_ids) if i not in associated_ids
+        ]
+        logging.info(
+            'EIP 주소 연결 상태 | 연결 필요: %s개 | 재사용 가능: %s개',
+            len(missing_ids),
+            len(idle_allocation_ids)
+        )
+
+        def allocate(_) -> Optional[str]:
+            try:
+                return self.client.allocate_address(
+                    Domain='vpc',
+                    TagSpecifications=[{
+                        'ResourceType': 'elastic-ip',
+                        'Tags': [{'Key': 'Name', 'Value': self.EIP_NAME_TAG}],
+                    }]
+                )['AllocationId']
+            except (ClientError, BotoCoreError) as e:
+                logging.error('EIP allocation API(`allocate_address()`) 호출 실패 | %s', e)
+
+                return None
+
+        def associate(instance_id: str, allocation_id: Optional[str]) -> Optional[str]:
+            if allocation_id is None:
+                return 'AllocationFailed'
+
+            try:
+                self.client.associate_address(
+                    AllocationId=allocation_id,
+                    InstanceId=instance_id,
+                    AllowReassociation=False  # 이미 연결된 주소를 빼앗지 않음
+                )
+            except (ClientError, BotoCoreError) as e:
+                logging.error(
+                    'EIP associate API(`associate_address()`) 호출 실패 | \
+`AllocationId`: %s | `InstanceId`: %s | %s',
+                    allocation_id,
+                    instance_id,
+                    e
+                )
+
+                return get_error_code(e)
+
+            return None
+
+        with ThreadPoolExecutor(max_workers=self.BATCH_MAX_WORKERS) as executor:
+            allocation_ids = idle_allocation_ids[:len(missing_ids)] + list(executor.map(
+                allocate, range(len(missing_ids) - len(idle_allocation_ids))))
+            results = dict(zip(
+                missing_ids,
+                executor.map(associate, missing_ids, allocation_ids)
+            ))
+
+        return results
+
 
 class IAMClient:
     '''IAM API를 활용하는 작업을 처리합니다.'''
 
     def __init__(self):
-        self.client = boto3.client(
-            'iam',
-            aws_access_key_id=os.getenv('AWS_MANAGER_AWS_ACCESS_KEY'),
-            aws_secret_access_key=os.getenv(
-                'AWS_MANAGER_AWS_SECRET_ACCESS_KEY'),
-            region_name='ap-northeast-2',
-        )
         self.STUDENT_POLICY_ARN = os.getenv(  # pylint: disable=invalid-name
             'AWS_MANAGER_AWS_STUDENT_POLICY_ARN')
         self.STUDENT_GROUP_NAME = 'student'  # pylint: disable=invalid-name
 
+    @property
+    def client(self):
+        '''공유되는 `iam` 클라이언트입니다. 처음 사용될 때 생성됩니다.'''
+
+        return get_client('iam')
+
     def detach_policy_from_group(
             self,
             group_name: str,
@@ -247,7 +930,7 @@ class IAMClient:
                 GroupName=group_name,
                 PolicyArn=policy_arn,
             )
-        except ClientError as e:
+        except (ClientError, BotoCoreError) as e:
             logging.error(
                 'IAM 그룹 정책 제거 API(`detach_group_policy()`) 호출 실패 | %s',
                 e,
@@ -266,7 +949,7 @@ class IAMClient:
                 GroupName=group_name,
                 PolicyArn=policy_arn,
             )
-        except ClientError as e:
+        except (ClientError, BotoCoreError) as e:
             logging.error(
                 'IAM 그룹 정책 부여 API(`attach_group_policy()`) 호출 실패 | %s',
                 e,
@@ -287,7 +970,7 @@ class IAMClient:
             )
 
             return True
-        except ClientError as e:
+        except (ClientError, BotoCoreError) as e:
             logging.error(
                 'IAM 유저 정책 부여 API(`attach_user_policy()`) 호출 실패 | %s',
                 e,
@@ -309,7 +992,7 @@ class IAMClient:
             )
 
             return True
-        except ClientError as e:
+        except (ClientError, BotoCoreError) as e:
             logging.error(
                 'IAM 유저 정책 제거 API(`detach_user_policy()`) 호출 실패 | %s',
                 e,
@@ -319,16 +1002,81 @@ class IAMClient:
 
 
 class CloudTrailClient:
-    '''AWS CloudTrail API를 활용하는 작업을 모두 구현합니다.'''
+    '''AWS CloudTrail API를 활용하는 작업을 모두 구현합니다.
 
-    def __init__(self):
-        self.client = boto3.client(
-            'cloudtrail',
-            aws_access_key_id=os.getenv('AWS_MANAGER_AWS_ACCESS_KEY'),
-            aws_secret_access_key=os.getenv(
-                'AWS_MANAGER_AWS_SECRET_ACCESS_KEY'),
-            region_name='ap-northeast-2',
-        )
+    `lookup_events()`의 계정 단위 호출 제한(초당 2회)은 모든 프로세스가 공유하는 호출 속도 제한기가 지킵니다.
+
+    Args:
+        max_lookup_rate (float, optional): `caller` 작업의 초당 `lookup_events()` 호출 횟수를 추가로 제한합니다.
+            (e.g. backfill 작업이 정기 수집 작업을 위한 여유를 남겨두는 경우)
+        caller (str): 호출 횟수를 함께 제한할 작업의 이름입니다. 같은 이름의 모든 프로세스/스레드가 제한을 공유합니다.
+    '''
+
+    def __init__(
+        self,
+        max_lookup_rate: Optional[float] = None,
+        caller: str = 'cloudtrail'
+    ) -> None:
+        self.lookup_rate_limiter = None
+
+        if max_lookup_rate is not None:
+            self.lookup_rate_limiter = get_caller_rate_limiter(
+                f'{caller}-lookup-events', max_lookup_rate)
+
+    @property
+    def client(self):
+        '''공유되는 `cloudtrail` 클라이언트입니다. 처음 사용될 때 생성됩니다.'''
+
+        return get_client('cloudtrail')
+
+    def iter_event_log_pages(
+        self,
+        event_name: str,
+        start_time: datetime,
+        end_time: datetime,
+        next_token: Optional[str] = None
+    ) -> Iterator[tuple[list[dict], Optional[str]]]:
+        '''지정된 시간 범위의 CloudTrail 로그를 페이지 단위로 조회하는 generator입니다.
+
+        이전 페이지까지의 결과를 메모리에 유지하지 않으며, 호출 제한(throttling) 응답은 botocore가 재시도합니다.
+        그 외의 오류는 `ClientError`/`BotoCoreError`로 전달되며, 마지막으로 받은 `next_token`을 넘겨 해당 위치부터 다시 조회할 수 있습니다.
+
+        Args:
+            event_name (str): AWS CloudTrail Event history의 Event name 입니다.
+            start_time (datetime): 조회 시작 시간으로 UTC 기준 시간이 들어와야 log를 정확하게 추출합니다.
+            end_time (datetime): 조회 종료 시간으로 UTC 기준 시간이 들어와야 log를 정확하게 추출합니다.
+            next_token (str): 조회를 재개할 페이지의 토큰입니다.
+
+        Yields:
+            `(페이지의 이벤트 목록, 다음 페이지의 토큰)`을 반환합니다. 마지막 페이지의 토큰은 None입니다.
+        '''
+
+        while True:
+            params = {
+                'LookupAttributes': [
+                    {
+                        'AttributeKey': 'EventName',
+                        'AttributeValue': event_name
+                    }
+                ],
+                'StartTime': start_time,
+                'EndTime': end_time,
+                'MaxResults': 50,
+            }
+
+            if next_token:
+                params['NextToken'] = next_token
+
+            if self.lookup_rate_limiter is not None:
+                self.lookup_rate_limiter.acquire()
+
+            response = self.client.lookup_events(**params)
+            next_token = response.get('NextToken')
+
+            yield response['Events'], next_token
+
+            if next_token is None:
+                return
 
     def get_event_log_by_event_name(
         self,
@@ -347,18 +1095,9 @@ class CloudTrailClient:
         event_logs = []
 
         try:
-            response = self.client.lookup_events(
-                LookupAttributes=[
-                    {
-                        'AttributeKey': 'EventName',
-                        'AttributeValue': event_name
-                    }
-                ],
-                StartTime=start_time,
-                EndTime=end_time,
-                MaxResults=50,
-            )
-        except ClientError as e:
+            for events, _ in self.iter_event_log_pages(event_name, start_time, end_time):
+                event_logs.extend(events)
+        except (ClientError, BotoCoreError) as e:
             logging.error(
                 'CloudTrail의 이벤트 이름 %s에 대한 이벤트 조회 실패 | %s',
                 event_name,
@@ -367,31 +1106,139 @@ class CloudTrailClient:
 
             return None
 
-        event_logs.extend(response['Events'])
+        return event_logs
+
+    def iter_event_log_pages_by_event_names(
+        self,
+        event_start_times: dict[str, datetime],
+        end_time: datetime,
+        max_workers: int = 4,
+        max_pending_pages: int = 8
+    ) -> Iterator[tuple[str, Optional[list[dict]]]]:
+        '''여러 event name에 대한 로그를 동시에 조회하며, 조회된 페이지를 순서대로 반환하는 generator입니다.
+
+        각 event name은 `event_start_times`에 지정된 자신의 조회 시작 시간부터 `end_time`까지 조회합니다.
+        각 event name의 조회는 별도의 스레드에서 진행되며, 모든 호출은 `lookup_events()`의 호출 제한을 공유합니다.
+        소비되지 않은 페이지는 최대 `max_pending_pages`개까지만 메모리에 유지됩니다.
+
+        Yields:
+            `(event_name, 페이지의 이벤트 목록)`을 반환합니다.
+            특정 event name의 조회에 실패한 경우 `(event_name, None)`을 반환하며, 이미 반환된 페이지는 유효합니다.
+        '''
+
+        page_queue = queue.Queue(maxsize=max_pending_pages)
+        stop_event = threading.Event()
+        fetch_done = object()
+
+        def put(item) -> bool:
+            while not stop_event.is_set():
+                try:
+                    page_queue.put(item, timeout=0.1)
+
+                    return True
+                except queue.Full:
+                    continue
 
-        while 'NextToken' in response.keys():
+            return False
+
+        def fetch(event_name: str, start_time: datetime) -> None:
             try:
-                response = self.client.lookup_events(
-                    LookupAttributes=[
-                        {
-                            'AttributeKey': 'EventName',
-                            'AttributeValue': event_name
-                        }
-                    ],
-                    StartTime=start_time,
-                    EndTime=end_time,
-                    MaxResults=50,
-                    NextToken=response['NextToken']
-                )
-            except ClientError as e:
+                for events, _ in self.iter_event_log_pages(event_name, start_time, end_time):
+                    if not put((event_name, events)):
+                        return
+            except (ClientError, BotoCoreError) as e:
                 logging.error(
                     'CloudTrail의 이벤트 이름 %s에 대한 이벤트 조회 실패 | %s',
                     event_name,
                     e,
                 )
+                put((event_name, None))
+            finally:
+                put(fetch_done)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for event_name, start_time in event_start_times.items():
+                executor.submit(fetch, event_name, start_time)
+
+            try:
+                remaining_cnt = len(event_start_times)
+
+                while remaining_cnt:
+                    item = page_queue.get()
+
+                    if item is fetch_done:
+                        remaining_cnt -= 1
+
+                        continue
+
+                    yield item
+            finally:
+                stop_event.set()
+                executor.shutdown(wait=True, cancel_futures=True)
 
+    def get_event_logs_by_event_names(
+        self,
+        event_names: Iterable[str],
+        start_time: datetime,
+        end_time: datetime,
+        max_workers: int = 4
+    ) -> Optional[dict[str, list[dict]]]:
+        '''여러 event name에 대한 로그를 동시에 조회합니다.
+
+        각 event name의 조회는 별도의 스레드에서 진행되며, 모든 호출은 `lookup_events()`의 호출 제한을 공유합니다.
+
+        Returns:
+            `{event_name: event_logs}` 형태로 반환합니다. 하나라도 조회에 실패하면 None을 반환합니다.
+        '''
+
+        event_names = list(event_names)
+        event_logs_dict = {event_name: [] for event_name in event_names}
+
+        for event_name, events in self.iter_event_log_pages_by_event_names(
+            dict.fromkeys(event_names, start_time),
+            end_time,
+            max_workers
+        ):
+            if events is None:
                 return None
 
-            event_logs.extend(response['Events'])
+            event_logs_dict[event_name].extend(events)
 
-        return event_logs
+        return event_logs_dict
+
+
+class S3Client:
+    '''AWS S3 API를 활용하는 작업을 처리합니다.'''
+
+    @property
+    def client(self):
+        '''공유되는 `s3` 클라이언트입니다. 처음 사용될 때 생성됩니다.'''
+
+        return get_client('s3')
+
+    def iter_objects(
+        self,
+        bucket: str,
+        prefix: str,
+        suffix: str = ''
+    ) -> Iterator[tuple[str, BinaryIO]]:
+        '''prefix 하위의 오브젝트들을 key 순서대로 조회하여, 내용을 스트림 형태로 반환합니다.
+
+        Yields:
+            `(오브젝트 key, 오브젝트 내용을 읽을 수 있는 스트림)`을 반환합니다.
+        '''
+
+        paginator = self.client.get_paginator('list_objects_v2')
+
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                if not obj['Key'].endswith(suffix):
+                    continue
+
+                body = self.client.get_object(
+                    Bucket=bucket, Key=obj['Key'])['Body']
+
+                try:
+                    yield obj['Key'], body
+                finally:
+                    body.close()
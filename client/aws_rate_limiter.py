@@ -0,0 +1,218 @@
+'''여러 프로세스가 공유하는 AWS API 호출 속도 제한기입니다.
+
+AWS는 계정/리전 단위로 API 호출 횟수를 제한하므로, Slack 핸들러(gunicorn 워커)와 cron 작업들이 각자 API를 호출하면
+호출 제한(throttling)에 걸리기 쉽습니다. API 계열(e.g. EC2 조회 API)별 token bucket의 상태를 파일에 저장하고
+파일 잠금으로 동기화하여, 같은 서버의 모든 프로세스/스레드가 하나의 호출 속도를 공유합니다.
+
+호출 제한 응답을 받으면 호출 속도를 절반으로 줄이고, 이후 호출 제한이 없으면 점진적으로 원래 속도까지 회복합니다(AIMD).
+상태 파일은 `AWS_MANAGER_RATE_LIMIT_DIR` 환경변수의 디렉터리(기본값: 임시 디렉터리 하위의 `aws-manager-rate-limits`)에 저장됩니다.
+'''
+
+
+import os
+import time
+import fcntl
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+# API 계열별 `(초당 호출 횟수, 순간 최대 호출 횟수)`
+RATE_LIMITS = {
+    'ec2-describe': (20, 50),
+    'ec2-mutate': (5, 20),
+    'iam': (10, 10),
+    'cloudtrail': (10, 10),
+    'cloudtrail-lookup-events': (2, 2),  # 계정/리전당 초당 2회
+}
+
+THROTTLING_ERROR_CODES = {
+    'Throttling',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+    'TooManyRequestsException',
+}
+
+
+def get_api_family(service_name: str, operation_name: str) -> Optional[str]:
+    '''API가 속한 호출 제한 계열을 반환합니다. 호출 속도를 제한하지 않는 API는 None을 반환합니다.'''
+
+    if service_name == 'ec2':
+        if operation_name.startswith(('Describe', 'Get')):
+            return 'ec2-describe'
+
+        return 'ec2-mutate'
+
+    if service_name == 'cloudtrail' and operation_name == 'LookupEvents':
+        return 'cloudtrail-lookup-events'
+
+    if service_name in RATE_LIMITS:
+        return service_name
+
+    return None
+
+
+class SharedRateLimiter:
+    '''파일에 상태를 저장하여 여러 프로세스가 공유하는 token bucket 방식의 호출 속도 제한기입니다.
+
+    Args:
+        path (str): 상태를 저장할 파일 경로입니다.
+        rate (float): 초당 허용되는 최대 호출 횟수입니다.
+        burst (int): 순간적으로 허용되는 최대 호출 횟수입니다.
+    '''
+
+    # tokens, updated_at, rate, throttled_at
+    STATE_FORMAT = struct.Struct('4d')
+    # 호출 제한 이후 회복을 시작하기까지의 시간(초)과, 초당 회복하는 호출 속도의 비율
+    RECOVERY_DELAY = 1
+    RECOVERY_RATIO = 0.05
+    MIN_RATE_RATIO = 0.05
+
+    def __init__(self, path: str, rate: float, burst: int) -> None:
+        self.path = path
+        self.max_rate = rate
+        self.min_rate = rate * self.MIN_RATE_RATIO
+        self.burst = burst
+        self._fd: Optional[int] = None
+        self._fd_pid: Optional[int] = None
+        self._lock = threading.Lock()  # `flock()`은 같은 프로세스의 스레드끼리는 배타적이지 않음
+
+    @contextmanager
+    def _locked_state(self) -> Iterator[list[float]]:
+        '''잠금을 얻고 상태를 읽습니다. 블록 안에서 변경한 상태는 블록이 끝날 때 저장됩니다.'''
+
+        with self._lock:
+            if self._fd is None or self._fd_pid != os.getpid():
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+                self._fd_pid = os.getpid()
+
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+            try:
+                data = os.pread(self._fd, self.STATE_FORMAT.size, 0)
+
+                if len(data) == self.STATE_FORMAT.size:
+                    state = list(self.STATE_FORMAT.unpack(data))
+                else:
+                    state = [self.burst, time.time(), self.max_rate, 0]
+
+                yield state
+
+                os.pwrite(self._fd, self.STATE_FORMAT.pack(*state), 0)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def acquire(self) -> None:
+        '''호출 가능한 token을 얻을 때까지 대기합니다.'''
+
+        while True:
+            with self._locked_state() as state:
+                tokens, updated_at, rate, throttled_at = state
+                now = time.time()
+                elapsed = max(0, now - updated_at)
+
+                if now - throttled_at > self.RECOVERY_DELAY:
+                    rate = min(self.max_rate, rate + elapsed * self.max_rate * self.RECOVERY_RATIO)
+
+                tokens = min(self.burst, tokens + elapsed * rate)
+                wait_seconds = 0
+
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait_seconds = (1 - tokens) / rate
+
+                state[:] = [tokens, now, rate, throttled_at]
+
+            if wait_seconds == 0:
+                return
+
+            time.sleep(wait_seconds)
+
+    def on_throttled(self) -> None:
+        '''호출 제한 응답을 받았으므로 호출 속도를 절반으로 줄입니다.'''
+
+        with self._locked_state() as state:
+            now = time.time()
+
+            # 동시에 보낸 요청들이 함께 제한된 경우 한 번만 줄임
+            if now - state[3] > self.RECOVERY_DELAY:
+                state[2] = max(self.min_rate, state[2] / 2)
+
+            state[0] = min(state[0], 0)
+            state[3] = now
+
+
+_limiters: dict[str, SharedRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _get_shared_rate_limiter(name: str, rate: float, burst: int) -> SharedRateLimiter:
+    '''이름(`name`)별로 상태 파일을 공유하는 호출 속도 제한기를 반환합니다.'''
+
+    limiter = _limiters.get(name)
+
+    if limiter is not None:
+        return limiter
+
+    with _limiters_lock:
+        if name not in _limiters:
+            state_dir = os.getenv(
+                'AWS_MANAGER_RATE_LIMIT_DIR',
+                os.path.join(tempfile.gettempdir(), 'aws-manager-rate-limits')
+            )
+            os.makedirs(state_dir, exist_ok=True)
+            _limiters[name] = SharedRateLimiter(
+                os.path.join(state_dir, f'{name}.state'), rate, burst)
+
+        return _limiters[name]
+
+
+def get_rate_limiter(api_family: str) -> SharedRateLimiter:
+    '''API 계열의 호출 속도 제한기를 반환합니다.'''
+
+    return _get_shared_rate_limiter(api_family, *RATE_LIMITS[api_family])
+
+
+def get_caller_rate_limiter(caller: str, rate: float, burst: int = 1) -> SharedRateLimiter:
+    '''특정 작업(`caller`)의 호출 속도 제한기를 반환합니다.
+
+    API 계열의 호출 제한과 별개로, 같은 작업의 모든 프로세스/스레드가 하나의 token bucket을 공유합니다.
+    (e.g. backfill 작업이 계정 단위 호출 제한 중 일부만 사용하도록 제한)
+    '''
+
+    return _get_shared_rate_limiter(f'caller-{caller}', rate, burst)
+
+
+def _get_event_api_family(event_name: str) -> Optional[str]:
+    # e.g. 'before-send.ec2.DescribeInstances'
+    _, service_name, operation_name = event_name.split('.', maxsplit=2)
+
+    return get_api_family(service_name, operation_name)
+
+
+def _acquire_before_send(event_name: str, **kwargs) -> None:
+    api_family = _get_event_api_family(event_name)
+
+    if api_family is not None:
+        get_rate_limiter(api_family).acquire()
+
+
+def _report_throttling(event_name: str, response=None, **kwargs) -> None:
+    if response is None:  # 응답을 받지 못함 (e.g. 네트워크 오류)
+        return
+
+    error_code = response[1].get('Error', {}).get('Code')
+    api_family = _get_event_api_family(event_name)
+
+    if error_code in THROTTLING_ERROR_CODES and api_family is not None:
+        get_rate_limiter(api_family).on_throttled()
+
+
+def install_rate_limiter(client) -> None:
+    '''botocore 클라이언트의 모든 API 호출(재시도 포함)에 호출 속도 제한을 적용합니다.'''
+
+    client.meta.events.register('before-send', _acquire_before_send)
+    client.meta.events.register('needs-retry', _report_throttling)
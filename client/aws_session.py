@@ -0,0 +1,89 @@
+'''모든 AWS 클라이언트가 공유하는 boto3 세션과 클라이언트 팩토리입니다.
+
+클라이언트는 처음 사용될 때 생성되어 프로세스 내 모든 스레드가 공유하므로,
+사용하지 않는 서비스의 클라이언트는 생성되지 않고 같은 서비스의 HTTP 커넥션 풀은 하나만 유지됩니다.
+모든 클라이언트의 API 호출에는 프로세스 간에 공유되는 호출 속도 제한(`client.aws_rate_limiter`)이 적용됩니다.
+설정은 아래 환경변수로 조정합니다.
+
+- `AWS_MANAGER_AWS_MAX_POOL_CONNECTIONS`: 클라이언트별 최대 HTTP 커넥션 수 (기본값 50)
+- `AWS_MANAGER_AWS_MAX_ATTEMPTS`: 최초 호출을 포함한 최대 호출 횟수 (기본값 5)
+- `AWS_MANAGER_AWS_CONNECT_TIMEOUT`, `AWS_MANAGER_AWS_READ_TIMEOUT`: 연결/응답 대기 시간(초) (기본값 5, 30)
+'''
+
+
+import os
+import threading
+from typing import Optional
+
+import boto3
+from botocore.config import Config
+
+from client.aws_rate_limiter import install_rate_limiter
+
+
+REGION_NAME = 'ap-northeast-2'
+
+
+class AWSClientFactory:
+    '''하나의 boto3 세션으로 서비스별 클라이언트를 생성하고 캐싱합니다.
+
+    boto3 세션은 스레드 간에 공유할 수 없으므로 클라이언트 생성은 잠금 안에서 수행하며,
+    생성된 클라이언트는 여러 스레드가 공유할 수 있습니다. fork된 프로세스에서는 세션과 클라이언트를 새로 생성합니다.
+
+    Args:
+        config (Config, optional): 모든 클라이언트에 적용할 botocore 설정입니다.
+    '''
+
+    def __init__(self, config: Optional[Config] = None) -> None:
+        self.config = config or Config(
+            region_name=REGION_NAME,
+            max_pool_connections=int(os.getenv('AWS_MANAGER_AWS_MAX_POOL_CONNECTIONS', '50')),
+            retries={
+                # 호출 속도는 프로세스 간에 공유되는 `client.aws_rate_limiter`가 조절
+                'mode': 'standard',
+                'total_max_attempts': int(os.getenv('AWS_MANAGER_AWS_MAX_ATTEMPTS', '5')),
+            },
+            connect_timeout=float(os.getenv('AWS_MANAGER_AWS_CONNECT_TIMEOUT', '5')),
+            read_timeout=float(os.getenv('AWS_MANAGER_AWS_READ_TIMEOUT', '30')),
+        )
+        self._session: Optional[boto3.session.Session] = None
+        self._clients: dict = {}
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get_client(self, service_name: str):
+        '''서비스의 클라이언트를 반환합니다. 클라이언트가 없다면 새로 생성합니다.'''
+
+        client = self._clients.get(service_name)
+
+        if client is not None and self._pid == os.getpid():
+            return client
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._session = None
+                self._clients = {}
+                self._pid = os.getpid()
+
+            if self._session is None:
+                self._session = boto3.session.Session(
+                    aws_access_key_id=os.getenv('AWS_MANAGER_AWS_ACCESS_KEY'),
+                    aws_secret_access_key=os.getenv('AWS_MANAGER_AWS_SECRET_ACCESS_KEY'),
+                    region_name=REGION_NAME,
+                )
+
+            if service_name not in self._clients:
+                client = self._session.client(service_name, config=self.config)
+                install_rate_limiter(client)
+                self._clients[service_name] = client
+
+            return self._clients[service_name]
+
+
+_default_factory = AWSClientFactory()
+
+
+def get_client(service_name: str):
+    '''프로세스 내에서 공유되는 서비스의 클라이언트를 반환합니다.'''
+
+    return _default_factory.get_client(service_name)
@@ -0,0 +1,25 @@
+'''EC2 인스턴스 정보를 담는 레코드 타입입니다.'''
+
+
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+
+class InstanceInfo(NamedTuple):
+    '''`describe_instances()` 응답에서 추출한 인스턴스 정보입니다. 태그나 IP 주소가 없으면 None입니다.'''
+
+    instance_state: str
+    name: Optional[str]
+    public_ip_address: Optional[str]
+    private_ip_address: Optional[str]
+
+
+class InventoryRecord(NamedTuple):
+    '''`instance_inventory` 테이블에 적재되는 인스턴스 정보입니다. 필드 순서는 테이블의 컬럼 순서와 같습니다.'''
+
+    instance_state: str
+    name: Optional[str]
+    public_ip_address: Optional[str]
+    private_ip_address: Optional[str]
+    launch_time: Optional[datetime]
+    state_transition_time: Optional[datetime]
@@ -0,0 +1,164 @@
+'''인스턴스 시작/중지 요청 이후의 상태 전환 완료를 확인하는 모듈입니다.
+
+`start_instances()`, `stop_instances()`는 요청이 접수되면 바로 반환되므로,
+인스턴스가 실제로 `running`/`stopped` 상태가 되었는지는 별도로 확인해야 합니다.
+요청을 처리하는 스레드는 `watch()`로 확인할 인스턴스를 등록만 하고 바로 반환되며,
+백그라운드 스레드 하나가 모든 사용자의 확인 대기 중인 인스턴스를 한 번에 조회합니다.
+'''
+
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Iterable, Optional
+
+from client.instance_info import InstanceInfo
+
+
+class InstanceTransitionWatcher:
+    '''인스턴스의 상태 전환 완료를 확인하여 사용자에게 알립니다.
+
+    Args:
+        ec2_client (EC2Client): 인스턴스 상태를 조회할 클라이언트입니다.
+        notify: 상태 전환이 확인된 인스턴스들을 사용자에게 알리는 함수입니다.
+            `(slack_id, 목표 상태, {instance_id: 인스턴스 정보})`를 인자로 받으며,
+            제한 시간 내에 목표 상태가 되지 않은 인스턴스의 정보는 None입니다.
+        poll_interval (float): 상태 조회 주기(초)입니다.
+        timeout (float): 상태 전환을 기다리는 최대 시간(초)입니다.
+    '''
+
+    # 목표 상태에 도달할 수 없는 상태
+    FAILED_STATES = ('shutting-down', 'terminated')
+
+    def __init__(
+        self,
+        ec2_client,
+        notify: Callable[[str, str, dict[str, Optional[InstanceInfo]]], None],
+        poll_interval: float = 3,
+        timeout: float = 600
+    ) -> None:
+        self.ec2_client = ec2_client
+        self.notify = notify
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._transitions: list[dict] = []
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def watch(
+        self,
+        slack_id: str,
+        instance_ids: Iterable[str],
+        target_state: str
+    ) -> None:
+        '''인스턴스들이 `target_state`가 되면 사용자에게 알리도록 등록합니다. 등록 후 바로 반환됩니다.'''
+
+        transition = {
+            'slack_id': slack_id,
+            'target_state': target_state,
+            'remaining_ids': set(instance_ids),
+            'deadline': time.monotonic() + self.timeout,
+        }
+
+        with self._lock:
+            self._transitions.append(transition)
+
+            # 확인할 인스턴스가 없으면 스레드가 종료되므로 필요할 때 다시 시작 (fork된 프로세스 포함)
+            if self._thread is None or self._thread_pid != os.getpid():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='instance-transition-watcher',
+                    daemon=True
+                )
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                time.sleep(self.poll_interval)
+
+                with self._lock:
+                    transitions = list(self._transitions)
+
+                    if not transitions:
+                        self._thread = None
+
+                        return
+
+                # 조회 중 예외(e.g. 네트워크 오류)가 발생해도 스레드가 종료되지 않고 다음 주기에 다시 조회
+                try:
+                    self._poll(transitions)
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    logging.error('인스턴스 상태 전환 확인 실패 | %s', e)
+        finally:
+            # 스레드가 예기치 않게 종료되더라도 다음 `watch()`에서 다시 시작
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def _poll(self, transitions: list[dict]) -> None:
+        '''확인 대기 중인 모든 인스턴스의 상태를 한 번에 조회하고, 상태 전환이 끝난 인스턴스를 사용자에게 알립니다.'''
+
+        instance_ids = set().union(*(t['remaining_ids'] for t in transitions))
+        instance_states = self.ec2_client.get_instance_states(instance_ids)
+
+        if instance_states is None:  # 다음 주기에 다시 조회
+            instance_states = {}
+
+        now = time.monotonic()
+        settled = []
+
+        for transition in transitions:
+            reached_ids = {
+                i for i in transition['remaining_ids']
+                if instance_states.get(i) == transition['target_state']
+            }
+            failed_ids = {
+                i for i in transition['remaining_ids']
+                if instance_states.get(i) in self.FAILED_STATES
+                or now > transition['deadline'] and i not in reached_ids
+            }
+
+            if reached_ids or failed_ids:
+                settled.append((transition, reached_ids, failed_ids))
+
+        if not settled:
+            return
+
+        # IP 주소는 상태 전환이 끝난 인스턴스들만 한 번에 조회
+        reached_ids = set().union(*(s[1] for s in settled))
+        instance_info_dict = {}
+
+        if reached_ids:
+            instance_info_dict = self.ec2_client.find_instances(instance_ids=reached_ids)
+
+            if instance_info_dict is None:  # 다음 주기에 다시 조회
+                instance_info_dict = {}
+                settled = [(t, set(), f) for t, _, f in settled if f]
+            else:
+                self.ec2_client.inventory.invalidate(reached_ids)
+
+        for transition, reached_ids, failed_ids in settled:
+            if failed_ids:
+                logging.error(
+                    '인스턴스 상태 전환 확인 실패 | 슬랙 ID: %s | 목표 상태: %s | 인스턴스 ID: %s',
+                    transition['slack_id'],
+                    transition['target_state'],
+                    failed_ids
+                )
+
+            self.notify(
+                transition['slack_id'],
+                transition['target_state'],
+                {
+                    **{i: instance_info_dict.get(i) for i in reached_ids},
+                    **dict.fromkeys(failed_ids),
+                }
+            )
+            transition['remaining_ids'] -= reached_ids | failed_ids
+
+        with self._lock:
+            self._transitions = [t for t in self._transitions if t['remaining_ids']]
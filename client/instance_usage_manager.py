@@ -6,6 +6,8 @@ from datetime import datetime, timedelta
 import holidays
 from pytz import timezone
 
+from client.usage_intervals import build_instance_intervals, calculate_usage_time
+
 
 class InstanceUsageManager:
     '''인스턴스의 사용량을 관리하고 일별 사용 한도와 공휴일을 고려하여 사용량을 추적하는 클래스.'''
@@ -31,20 +33,18 @@ class InstanceUsageManager:
 
         return timedelta(hours=threshold_time)
 
-    def get_remaining_time(self, logs: list[tuple[str, str]]) -> timedelta:
-        '''오늘의 Log들을 통해 총 instance 사용 시간 계산 후 남은 사용 시간을 반환합니다. '''
-
-        total_usage_time = timedelta()
-
-        for idx, log in enumerate(logs[::2]):
-            start_time = log[-1]
-
-            try:
-                stop_time = logs[idx*2 + 1][-1]
-                usage_time = stop_time - start_time
-            except IndexError:
-                usage_time = datetime.now() - start_time
-
-            total_usage_time += usage_time
+    def get_remaining_time(self, logs: list[tuple[str, str, datetime]]) -> timedelta:
+        '''오늘의 `(instance_id, log_type, log_time)` Log들을 통해 총 instance 사용 시간 계산 후 남은 사용 시간을 반환합니다. '''
+
+        # 인스턴스별 사용 구간을 만든 뒤, 여러 인스턴스의 사용 시간이 겹치는 경우 한 번만 계산
+        now_dt = datetime.now(timezone('Asia/Seoul')).replace(tzinfo=None)
+        total_usage_time = calculate_usage_time(
+            (
+                interval
+                for instance_intervals in build_instance_intervals(logs, now_dt).values()
+                for interval in instance_intervals
+            ),
+            now_dt
+        )
 
         return self.throshold_time - total_usage_time
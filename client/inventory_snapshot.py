@@ -0,0 +1,262 @@
+'''여러 프로세스가 공유하는 EC2 인스턴스 정보 스냅샷입니다.
+
+gunicorn 워커들은 각자 인스턴스 정보 캐시를 가지고 있으므로, 캐시를 각자 갱신하면 워커 수만큼 AWS API 호출이 늘어납니다.
+스냅샷은 SQLite(WAL 모드) 파일에 저장되어 모든 워커가 AWS API 호출 없이 읽을 수 있으며,
+갱신은 파일 잠금을 먼저 얻은 하나의 워커만 수행합니다.
+스냅샷이 바뀔 때마다 버전이 증가하므로, 각 워커는 버전만 비교하여 자신의 캐시가 오래되었는지 확인할 수 있습니다.
+'''
+
+
+import os
+import fcntl
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+
+from client.instance_info import InstanceInfo
+
+
+class InventorySnapshot:
+    '''SQLite 파일에 저장되는 인스턴스 정보 스냅샷입니다.
+
+    Args:
+        path (str): 스냅샷을 저장할 SQLite 파일 경로입니다.
+    '''
+
+    COLUMNS = InstanceInfo._fields
+
+    # 테이블 구조가 바뀌면 증가시키며, 버전이 다른 스냅샷 파일은 새로 생성됨
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock_path = f'{path}.lock'
+        self._local = threading.local()
+
+        with self._transaction(immediate=True) as conn:
+            if conn.execute('PRAGMA user_version').fetchone()[0] != self.SCHEMA_VERSION:
+                for table in ('instance', 'invalidated_instance', 'meta'):
+                    conn.execute(f'DROP TABLE IF EXISTS {table}')
+
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS instance (
+                    instance_id             TEXT    PRIMARY KEY
+                    , instance_state        TEXT
+                    , name                  TEXT
+                    , public_ip_address     TEXT
+                    , private_ip_address    TEXT
+                    , observed_at           REAL    NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS invalidated_instance (
+                    instance_id         TEXT    PRIMARY KEY
+                    , invalidated_at    REAL    NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS meta (
+                    id              INTEGER PRIMARY KEY CHECK (id = 1)
+                    , version       INTEGER NOT NULL
+                    , refreshed_at  REAL
+                )
+            ''')
+            conn.execute('INSERT OR IGNORE INTO meta VALUES (1, 0, NULL)')
+            conn.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+
+    def _connect(self) -> sqlite3.Connection:
+        '''현재 스레드의 SQLite 커넥션을 반환합니다. fork된 프로세스에서는 새로운 커넥션을 생성합니다.'''
+
+        conn = getattr(self._local, 'conn', None)
+
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+
+        return conn
+
+    @contextmanager
+    def _transaction(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        '''트랜잭션을 시작합니다. 쓰기 트랜잭션(`immediate`)은 다른 프로세스의 쓰기가 끝날 때까지 대기합니다.'''
+
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+        conn.execute('COMMIT')
+
+    def get_version(self) -> tuple[int, Optional[float]]:
+        '''스냅샷의 버전과 마지막 전체 갱신 시각(UNIX timestamp)을 반환합니다.'''
+
+        return self._connect().execute(
+            'SELECT version, refreshed_at FROM meta'
+        ).fetchone()
+
+    def read(self) -> tuple[int, Optional[float], dict[str, InstanceInfo], set[str]]:
+        '''스냅샷 전체를 읽습니다.
+
+        Returns:
+            `(버전, 마지막 전체 갱신 시각, 인스턴스별 정보, 다시 조회가 필요한 인스턴스 ID 집합)`을 반환합니다.
+        '''
+
+        with self._transaction() as conn:  # 일관된 스냅샷을 조회
+            version, refreshed_at = conn.execute(
+                'SELECT version, refreshed_at FROM meta').fetchone()
+            instances = {
+                row[0]: InstanceInfo(*row[1:])
+                for row in conn.execute(
+                    f'SELECT instance_id, {", ".join(self.COLUMNS)} FROM instance')
+            }
+            invalidated_ids = {
+                row[0] for row in conn.execute('SELECT instance_id FROM invalidated_instance')
+            }
+
+        return version, refreshed_at, instances, invalidated_ids
+
+    def write(
+        self,
+        instances: dict[str, InstanceInfo],
+        fetched_at: float,
+        refreshed_ids: Optional[Iterable[str]] = None
+    ) -> None:
+        '''조회한 인스턴스 정보를 스냅샷에 반영합니다.
+
+        조회를 시작한 이후(`fetched_at`)에 `invalidate()`된 인스턴스는 조회 결과에 변경 사항이 반영되지 않았을 수 있으므로,
+        다시 조회가 필요한 상태로 남겨둡니다. 조회를 시작한 이후에 반영된 상태 변경 이벤트도 덮어쓰지 않습니다.
+
+        Args:
+            instances: 조회된 인스턴스별 정보입니다.
+            fetched_at: 조회를 시작한 시각(UNIX timestamp)입니다.
+            refreshed_ids: 일부 인스턴스만 다시 조회한 경우, 조회 대상이었던 인스턴스 ID입니다.
+                None이면 전체 인스턴스를 조회한 것으로 보고 스냅샷 전체를 교체합니다.
+        '''
+
+        placeholders = ', '.join('?' * (len(self.COLUMNS) + 2))
+        # 조회 결과가 반영된(= 조회 이후에 상태 변경 이벤트가 반영되지 않은) 인스턴스만 다시 조회할 필요가 없음
+        clear_invalidated_query = '''
+            DELETE FROM invalidated_instance
+            WHERE invalidated_at < :fetched_at
+                AND instance_id NOT IN (
+                    SELECT instance_id FROM instance WHERE observed_at > :fetched_at
+                )
+        '''
+
+        with self._transaction(immediate=True) as conn:
+            if refreshed_ids is None:
+                conn.execute('DELETE FROM instance WHERE observed_at < ?', (fetched_at,))
+                conn.execute(clear_invalidated_query, {'fetched_at': fetched_at})
+                conn.execute('UPDATE meta SET refreshed_at = ?', (fetched_at,))
+            else:
+                refreshed_ids = list(refreshed_ids)
+                conn.executemany(
+                    'DELETE FROM instance WHERE instance_id = ? AND observed_at < ?',
+                    [(i, fetched_at) for i in refreshed_ids]
+                )
+                conn.executemany(
+                    f'{clear_invalidated_query} AND instance_id = :instance_id',
+                    [{'fetched_at': fetched_at, 'instance_id': i} for i in refreshed_ids]
+                )
+
+            # 남아있는 행은 조회 이후에 상태 변경 이벤트가 반영된 인스턴스
+            conn.executemany(
+                f'INSERT OR IGNORE INTO instance VALUES ({placeholders})',
+                [
+                    (instance_id, *info, fetched_at)
+                    for instance_id, info in instances.items()
+                ]
+            )
+            conn.execute('UPDATE meta SET version = version + 1')
+
+    def invalidate(self, instance_ids: Iterable[str]) -> None:
+        '''인스턴스의 상태가 바뀌었으므로, 모든 워커가 다음 조회 시 정보를 다시 조회하도록 표시합니다.'''
+
+        invalidated_at = time.time()
+
+        with self._transaction(immediate=True) as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO invalidated_instance VALUES (?, ?)',
+                [(i, invalidated_at) for i in instance_ids]
+            )
+            conn.execute('UPDATE meta SET version = version + 1')
+
+    def apply_state_change(
+        self,
+        instance_id: str,
+        instance_state: Optional[str],
+        changed_at: float,
+        refetch: bool = False
+    ) -> bool:
+        '''인스턴스 상태 변경 이벤트를 스냅샷에 반영합니다.
+
+        이벤트 시각은 초 단위이므로, 마지막 관측 시각과 같은 초에 발생한 이벤트는 반영하되 다시 조회가 필요한 상태로 표시합니다.
+        새로 발견된 인스턴스도 Name 태그, IP 주소 등을 알 수 없으므로 다시 조회가 필요한 상태로 표시합니다.
+
+        Args:
+            instance_id: 상태가 바뀐 인스턴스 ID입니다.
+            instance_state: 바뀐 상태입니다. None이면 스냅샷에서 인스턴스를 제거합니다.
+            changed_at: 상태가 바뀐 시각(UNIX timestamp)입니다.
+            refetch: 상태 외의 정보(e.g. IP 주소)도 바뀌었을 수 있어 다시 조회가 필요한지 여부입니다.
+
+        Returns:
+            이미 더 최신의 정보가 반영되어 있어 이벤트를 무시한 경우 False를 반환합니다.
+        '''
+
+        with self._transaction(immediate=True) as conn:
+            row = conn.execute(
+                'SELECT observed_at FROM instance WHERE instance_id = ?', (instance_id,)
+            ).fetchone()
+
+            if row is not None:
+                observed_at = row[0]
+            else:
+                observed_at = conn.execute('SELECT refreshed_at FROM meta').fetchone()[0] or 0
+
+            if changed_at + 1 <= observed_at:
+                return False
+
+            if instance_state is None:
+                conn.execute('DELETE FROM instance WHERE instance_id = ?', (instance_id,))
+                conn.execute(
+                    'DELETE FROM invalidated_instance WHERE instance_id = ?', (instance_id,))
+            else:
+                conn.execute(
+                    '''
+                    INSERT INTO instance (instance_id, instance_state, observed_at) VALUES (?, ?, ?)
+                    ON CONFLICT (instance_id) DO UPDATE SET
+                        instance_state = excluded.instance_state
+                        , observed_at = MAX(observed_at, excluded.observed_at)
+                    ''',
+                    (instance_id, instance_state, changed_at)
+                )
+
+                if refetch or row is None or changed_at <= observed_at:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO invalidated_instance VALUES (?, ?)',
+                        (instance_id, time.time())
+                    )
+
+            conn.execute('UPDATE meta SET version = version + 1')
+
+        return True
+
+    @contextmanager
+    def refresh_lock(self) -> Iterator[None]:
+        '''스냅샷 갱신 잠금을 얻습니다. 다른 프로세스가 갱신 중이라면 갱신이 끝날 때까지 대기합니다.'''
+
+        with open(self.lock_path, 'a', encoding='utf-8') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -2,22 +2,131 @@
 
 
 import os
+import atexit
 import logging
-from datetime import datetime, time
-from typing import Optional
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Iterator, Optional
 
 import psycopg
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import ConnectionPool
+
+from .instance_info import InventoryRecord
+
+
+# 프로세스별 커넥션 풀 (key: conninfo)
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+# fork 이전 부모 프로세스에서 생성된 풀은 자식 프로세스에서 사용하거나 닫으면 안 됩니다.
+# (소켓을 공유하므로 부모의 커넥션이 끊어짐) GC에 의해 닫히지 않도록 참조만 유지합니다.
+_inherited_pools: list[ConnectionPool] = []
+
+
+def _reset_pools_after_fork() -> None:
+    '''gunicorn 워커와 같이 fork된 자식 프로세스에서 부모의 커넥션 풀을 분리합니다.'''
+
+    global _pools_lock  # pylint: disable=global-statement
+
+    _inherited_pools.extend(_pools.values())
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+def _close_pools() -> None:
+    '''프로세스 종료 시 현재 프로세스가 생성한 커넥션 풀을 정리합니다.'''
+
+    for pool in list(_pools.values()):
+        pool.close()
+
+
+os.register_at_fork(after_in_child=_reset_pools_after_fork)
+atexit.register(_close_pools)
 
 
 class PSQLClient:
-    '''메인 클라이언트입니다.'''
+    '''메인 클라이언트입니다.
+
+    기본적으로 프로세스 단위의 커넥션 풀을 사용하며, 풀 설정은 아래 환경변수로 조정합니다.
 
-    def __init__(self) -> None:
+    - `AWS_MANAGER_DB_POOL`: `off`로 설정하면 쿼리마다 새로운 커넥션을 생성합니다.
+    - `AWS_MANAGER_DB_POOL_MIN_SIZE`, `AWS_MANAGER_DB_POOL_MAX_SIZE`: 풀 크기 (기본값 1, 10)
+    - `AWS_MANAGER_DB_POOL_MAX_IDLE`: 유휴 커넥션이 정리되기까지의 시간(초) (기본값 300)
+    - `AWS_MANAGER_DB_POOL_TIMEOUT`: 커넥션 획득 대기 시간(초) (기본값 10)
+
+    `AWS_MANAGER_INSTANCE_INVENTORY_SOURCE` 환경변수를 `db`로 설정하면,
+    인스턴스 상태를 AWS API 대신 `instance_inventory` 테이블에서 조회합니다.
+    '''
+
+    def __init__(
+        self,
+        use_pool: Optional[bool] = None,
+        ec2_client=None
+    ) -> None:
         self.host = os.getenv('AWS_MANAGER_DB_HOST')
         self.dbname = os.getenv('AWS_MANAGER_DB_NAME')
         self.user = os.getenv('AWS_MANAGER_DB_USER')
         self.password = os.getenv('AWS_MANAGER_DB_PW')
 
+        if use_pool is None:
+            use_pool = os.getenv('AWS_MANAGER_DB_POOL', 'on').lower() != 'off'
+
+        self.use_pool = use_pool
+        self._ec2_client = ec2_client  # 인스턴스 정보 캐시를 공유할 `EC2Client`
+        self.use_instance_inventory = os.getenv(
+            'AWS_MANAGER_INSTANCE_INVENTORY_SOURCE', 'aws').lower() == 'db'
+
+    def _get_pool(self) -> ConnectionPool:
+        '''현재 프로세스의 커넥션 풀을 반환합니다. 풀이 없다면 새로 생성합니다.'''
+
+        conninfo = make_conninfo(
+            host=self.host,
+            dbname=self.dbname,
+            user=self.user,
+            password=self.password
+        )
+        pool = _pools.get(conninfo)
+
+        if pool is not None:
+            return pool
+
+        with _pools_lock:
+            pool = _pools.get(conninfo)
+
+            if pool is None:
+                pool = ConnectionPool(
+                    conninfo,
+                    min_size=int(os.getenv('AWS_MANAGER_DB_POOL_MIN_SIZE', '1')),
+                    max_size=int(os.getenv('AWS_MANAGER_DB_POOL_MAX_SIZE', '10')),
+                    max_idle=float(os.getenv('AWS_MANAGER_DB_POOL_MAX_IDLE', '300')),
+                    timeout=float(os.getenv('AWS_MANAGER_DB_POOL_TIMEOUT', '10')),
+                    check=ConnectionPool.check_connection,  # 대여 전 health check
+                    name=f'aws-manager-{os.getpid()}',
+                    open=False,
+                )
+                pool.open(wait=False)
+                _pools[conninfo] = pool
+
+        return pool
+
+    @contextmanager
+    def _connect(self) -> Iterator[psycopg.Connection]:
+        '''커넥션을 대여합니다. 블록이 정상 종료되면 커밋, 예외 발생 시 롤백됩니다.'''
+
+        if self.use_pool:
+            with self._get_pool().connection() as conn:
+                yield conn
+        else:
+            with psycopg.connect(  # pylint: disable=not-context-manager
+                host=self.host,
+                dbname=self.dbname,
+                user=self.user,
+                password=self.password
+            ) as conn:
+                yield conn
+
     def _execute_query(
         self,
         query: str,
@@ -25,12 +134,7 @@ class PSQLClient:
         many: bool = False
     ) -> Optional[list[tuple[str]]]:
         try:
-            with psycopg.connect(  # pylint: disable=not-context-manager
-                host=self.host,
-                dbname=self.dbname,
-                user=self.user,
-                password=self.password
-            ) as conn:
+            with self._connect() as conn:
                 with conn.cursor() as cur:
                     if many:
                         # tuple -> list
@@ -43,6 +147,41 @@ class PSQLClient:
         except psycopg.Error as e:
             logging.error('쿼리 실행 실패 | query: %s | error: %s', query, e)
 
+    def _bulk_merge(
+        self,
+        staging_query: str,
+        copy_query: str,
+        rows: Iterable[tuple],
+        merge_query: str,
+        merge_params: Optional[dict] = None
+    ) -> Optional[tuple[int, int]]:
+        '''대량의 데이터를 COPY로 임시 테이블에 적재한 뒤, 하나의 쿼리로 본 테이블에 병합합니다.
+
+        모든 과정은 하나의 트랜잭션으로 처리되며, `merge_params`는 병합 쿼리의 파라미터입니다.
+
+        Returns:
+            `(병합된 행의 수, 중복으로 무시된 행의 수)`를 반환합니다. 실패 시 None을 반환합니다.
+        '''
+
+        try:
+            with self._connect() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(staging_query)
+                    row_cnt = 0
+
+                    with cur.copy(copy_query) as copy:
+                        for row in rows:
+                            copy.write_row(row)
+                            row_cnt += 1
+
+                    cur.execute(merge_query, merge_params)
+
+                    return cur.rowcount, row_cnt - cur.rowcount
+        except psycopg.Error as e:
+            logging.error('대량 적재 실패 | query: %s | error: %s', merge_query, e)
+
+        return None
+
     def insert_into_student(
         self,
         users_info: list[dict[str, str]],
@@ -137,26 +276,49 @@ class PSQLClient:
 
     def insert_into_ownership_info(
         self,
-        owner_info_list: list[tuple[int, str]]
-    ) -> None:
-        '''사용자의 instance 소유 정보를 DB에 저장합니다.'''
+        owner_info_list: Iterable[tuple[int, str]]
+    ) -> Optional[tuple[int, int]]:
+        '''사용자의 instance 소유 정보를 DB에 저장합니다.
 
-        query = '''
+        Returns:
+            `(적재된 행의 수, 중복으로 무시된 행의 수)`를 반환합니다. 실패 시 None을 반환합니다.
+        '''
+
+        staging_query = '''
+            CREATE TEMP TABLE
+                staging_ownership_info (
+                    owned_by        INTEGER
+                    , instance_id   TEXT
+                )
+            ON COMMIT DROP
+            ;
+        '''
+        copy_query = '''
+            COPY
+                staging_ownership_info (owned_by, instance_id)
+            FROM
+                STDIN
+        '''
+        merge_query = '''
             INSERT INTO
                 ownership_info (
                     owned_by
                     , instance_id
                 )
-            VALUES
-                (%s, %s)
-            ON 
-                CONFLICT (instance_id) 
-            DO 
+            SELECT
+                owned_by
+                , instance_id
+            FROM
+                staging_ownership_info
+            ON
+                CONFLICT (instance_id)
+            DO
                 NOTHING
             ;
         '''
 
-        self._execute_query(query, (owner_info_list,), many=True)
+        return self._bulk_merge(
+            staging_query, copy_query, owner_info_list, merge_query)
 
     def check_existed_instance_id(
         self,
@@ -181,6 +343,28 @@ class PSQLClient:
     ) -> Optional[list[str]]:
         '''특정 사용자 소유의 모든 인스턴스에 대한 ID를 반환합니다.'''
 
+        if self.use_instance_inventory:
+            query = '''
+                SELECT
+                    oi.instance_id
+                FROM
+                    iam_user AS iu
+                JOIN
+                    ownership_info AS oi ON iu.user_id = oi.owned_by
+                JOIN
+                    instance_inventory AS ii ON oi.instance_id = ii.instance_id
+                WHERE
+                    iu.owned_by = %s
+                    AND ii.instance_state IN ('running', 'stopped')
+                ;
+            '''
+            fetched_data = self._execute_query(query, (student_id,))
+
+            if fetched_data:
+                return [d[0] for d in fetched_data]  # `instance_id`
+
+            return None
+
         query = '''
             SELECT
                 instance_id
@@ -205,17 +389,162 @@ class PSQLClient:
             for d in fetched_data:
                 instance_id_list.append(d[0])  # `instance_id`
 
-            from .aws_client import EC2Client
+            if self._ec2_client is None:
+                from .aws_client import EC2Client
+
+                self._ec2_client = EC2Client()
+
+            instance_info_dict = self._ec2_client.get_cached_instance_info(
+                instance_id_list)
 
-            ec2_client = EC2Client()
-            instance_live_list = ec2_client.get_live_instance_id_list(
-                ['running', 'stopped'])
+            if instance_info_dict is None:
+                return None
 
             instance_id_list = [
-                i for i in instance_id_list if i in instance_live_list]
+                i for i in instance_id_list
+                if i in instance_info_dict
+                and instance_info_dict[i].instance_state in ('running', 'stopped')
+            ]
 
             return instance_id_list
 
+    def upsert_instance_inventory(
+        self,
+        instances: dict[str, InventoryRecord],
+        observed_at: datetime
+    ) -> Optional[tuple[int, int]]:
+        '''전체 인스턴스의 정보를 `instance_inventory` 테이블에 반영합니다.
+
+        `observed_at` 이후에 관측된 정보는 덮어쓰지 않으며, 스냅샷에 없는 인스턴스(삭제된 인스턴스)의 정보는 제거합니다.
+
+        Args:
+            instances: `EC2Client.describe_inventory()`가 반환한 인스턴스별 정보입니다.
+            observed_at: 인스턴스 정보 조회를 시작한 시각입니다.
+
+        Returns:
+            `(반영된 행의 수, 더 최신 정보가 있어 무시된 행의 수)`를 반환합니다. 실패 시 None을 반환합니다.
+        '''
+
+        staging_query = '''
+            CREATE TEMP TABLE
+                staging_instance_inventory (
+                    LIKE instance_inventory
+                )
+            ON COMMIT DROP
+            ;
+        '''
+        copy_query = '''
+            COPY
+                staging_instance_inventory (
+                    instance_id
+                    , instance_state
+                    , name
+                    , public_ip_address
+                    , private_ip_address
+                    , launch_time
+                    , state_transition_time
+                    , observed_at
+                )
+            FROM
+                STDIN
+        '''
+        merge_query = '''
+            WITH deleted AS (
+                DELETE FROM
+                    instance_inventory AS ii
+                WHERE
+                    ii.observed_at < (SELECT MIN(observed_at) FROM staging_instance_inventory)
+                    AND NOT EXISTS (
+                        SELECT
+                            1
+                        FROM
+                            staging_instance_inventory AS sii
+                        WHERE
+                            sii.instance_id = ii.instance_id
+                    )
+            )
+            INSERT INTO
+                instance_inventory
+            SELECT
+                *
+            FROM
+                staging_instance_inventory
+            ON
+                CONFLICT (instance_id)
+            DO UPDATE SET
+                instance_state = EXCLUDED.instance_state
+                , name = EXCLUDED.name
+                , public_ip_address = EXCLUDED.public_ip_address
+                , private_ip_address = EXCLUDED.private_ip_address
+                , launch_time = EXCLUDED.launch_time
+                , state_transition_time = EXCLUDED.state_transition_time
+                , observed_at = EXCLUDED.observed_at
+            WHERE
+                instance_inventory.observed_at < EXCLUDED.observed_at
+            ;
+        '''
+        rows = (
+            (instance_id, *info, observed_at)  # `InventoryRecord`의 필드 순서는 테이블 컬럼 순서와 같음
+            for instance_id, info in instances.items()
+        )
+
+        return self._bulk_merge(staging_query, copy_query, rows, merge_query)
+
+    def update_instance_inventory_state(
+        self,
+        instance_id: str,
+        instance_state: str,
+        changed_at: datetime
+    ) -> None:
+        '''인스턴스 상태 변경 이벤트를 `instance_inventory` 테이블에 반영합니다.
+
+        이벤트 시각은 초 단위이므로, 이벤트와 같은 초 이전에 관측된 정보만 덮어씁니다.
+        새로 발견된 인스턴스는 상태만 적재하며, 나머지 정보는 다음 스냅샷 작업에서 채워집니다.
+        '''
+
+        query = '''
+            INSERT INTO
+                instance_inventory (
+                    instance_id
+                    , instance_state
+                    , observed_at
+                )
+            VALUES
+                (%s, %s, %s)
+            ON
+                CONFLICT (instance_id)
+            DO UPDATE SET
+                instance_state = EXCLUDED.instance_state
+                , observed_at = GREATEST(instance_inventory.observed_at, EXCLUDED.observed_at)
+            WHERE
+                instance_inventory.observed_at < EXCLUDED.observed_at + INTERVAL '1 second'
+            ;
+        '''
+
+        self._execute_query(query, (instance_id, instance_state, changed_at))
+
+    def get_inventory_instance_ids(
+        self,
+        states: Iterable[str]
+    ) -> Optional[set[str]]:
+        '''`instance_inventory` 테이블에서 주어진 상태인 인스턴스의 ID를 반환합니다. 실패 시 None을 반환합니다.'''
+
+        query = '''
+            SELECT
+                instance_id
+            FROM
+                instance_inventory
+            WHERE
+                instance_state = ANY(%s)
+            ;
+        '''
+        fetched_data = self._execute_query(query, (list(states),))
+
+        if fetched_data is None:
+            return None
+
+        return {d[0] for d in fetched_data}
+
     def get_student_owned_instances(
         self,
         student_id: str
@@ -305,23 +634,170 @@ class PSQLClient:
 
     def insert_into_cloudtrail_log(
         self,
-        logs: list[tuple[str, str, datetime]]
+        logs: Iterable[tuple[str, str, datetime]]
+    ) -> Optional[tuple[int, int]]:
+        '''CloudTrail의 로그를 적재합니다.
+
+        Returns:
+            `(적재된 행의 수, 중복으로 무시된 행의 수)`를 반환합니다. 실패 시 None을 반환합니다.
+        '''
+
+        # `log_time`은 기존과 동일하게 세션 timezone 기준으로 변환되어 적재됩니다.
+        staging_query = '''
+            CREATE TEMP TABLE
+                staging_cloudtrail_log (
+                    instance_id     TEXT
+                    , log_type      TEXT
+                    , log_time      TIMESTAMPTZ
+                )
+            ON COMMIT DROP
+            ;
+        '''
+        copy_query = '''
+            COPY
+                staging_cloudtrail_log (instance_id, log_type, log_time)
+            FROM
+                STDIN
+        '''
+        merge_query = '''
+            INSERT INTO
+                cloudtrail_log (instance_id, log_type, log_time)
+            SELECT
+                instance_id
+                , log_type
+                , log_time
+            FROM
+                staging_cloudtrail_log
+            ON
+                CONFLICT (instance_id, log_type, log_time)
+            DO
+                NOTHING
+            ;
+        '''
+
+        return self._bulk_merge(staging_query, copy_query, logs, merge_query)
+
+    def get_cloudtrail_log_watermark(
+        self,
+        event_names: Iterable[str]
+    ) -> Optional[dict[str, datetime]]:
+        '''CloudTrail 로그 수집 파이프라인의 이벤트별 수집 위치를 반환합니다.
+
+        Returns:
+            `{event_name: fetched_until}` 형태로 반환합니다.
+            수집 위치가 저장되지 않은 이벤트는 포함되지 않으며, 조회 실패 시 None을 반환합니다.
+        '''
+
+        query = '''
+            SELECT
+                event_name
+                , fetched_until
+            FROM
+                cloudtrail_log_watermark
+            WHERE
+                event_name = ANY(%s)
+            ;
+        '''
+
+        fetched_data = self._execute_query(query, (list(event_names),))
+
+        if fetched_data is None:
+            return None
+
+        return dict(fetched_data)
+
+    def update_cloudtrail_log_watermark(
+        self,
+        watermarks: list[tuple[str, datetime]]
     ) -> None:
-        '''CloudTrail의 로그를 적재합니다.'''
+        '''CloudTrail 로그 수집 파이프라인의 이벤트별 수집 위치를 갱신합니다.'''
+
+        if not watermarks:
+            return
 
         query = '''
             INSERT INTO
-                cloudtrail_log (instance_id, log_type, log_time)
+                cloudtrail_log_watermark (
+                    event_name
+                    , fetched_until
+                )
             VALUES
-                (%s, %s, %s)
-            ON 
-                CONFLICT (instance_id, log_type, log_time) 
-            DO 
-                NOTHING
+                (%s, %s)
+            ON
+                CONFLICT (event_name)
+            DO UPDATE SET
+                fetched_until = EXCLUDED.fetched_until
+                , updated_at = NOW()
             ;
         '''
 
-        self._execute_query(query, (logs, ), many=True)
+        self._execute_query(query, (watermarks,), many=True)
+
+    def get_completed_backfill_slices(
+        self,
+        range_start_time: datetime,
+        range_end_time: datetime
+    ) -> Optional[set[tuple[str, datetime, datetime]]]:
+        '''CloudTrail 로그 backfill 작업에서 이미 완료된 구간들을 반환합니다.
+
+        Returns:
+            `(event_name, slice_start, slice_end)` 형태의 집합을 반환합니다. 조회 실패 시 None을 반환합니다.
+        '''
+
+        query = '''
+            SELECT
+                event_name
+                , slice_start
+                , slice_end
+            FROM
+                cloudtrail_backfill_checkpoint
+            WHERE
+                slice_start >= %s
+                AND slice_end <= %s
+            ;
+        '''
+
+        fetched_data = self._execute_query(
+            query, (range_start_time, range_end_time))
+
+        if fetched_data is None:
+            return None
+
+        return set(fetched_data)
+
+    def insert_backfill_checkpoint(
+        self,
+        event_name: str,
+        slice_start: datetime,
+        slice_end: datetime,
+        insert_result: tuple[int, int]
+    ) -> None:
+        '''CloudTrail 로그 backfill 작업의 구간 완료 기록을 저장합니다.'''
+
+        query = '''
+            INSERT INTO
+                cloudtrail_backfill_checkpoint (
+                    event_name
+                    , slice_start
+                    , slice_end
+                    , inserted_cnt
+                    , duplicated_cnt
+                )
+            VALUES
+                (%s, %s, %s, %s, %s)
+            ON
+                CONFLICT (event_name, slice_start, slice_end)
+            DO UPDATE SET
+                inserted_cnt = EXCLUDED.inserted_cnt
+                , duplicated_cnt = EXCLUDED.duplicated_cnt
+                , completed_at = NOW()
+            ;
+        '''
+
+        self._execute_query(
+            query,
+            (event_name, slice_start, slice_end, *insert_result)
+        )
 
     def get_remaining_usage_time(
         self,
@@ -395,34 +871,568 @@ class PSQLClient:
             ORDER BY
                 iam_user_id ASC
                 , log_time ASC
+                , log_type ASC
+                , instance_id ASC
             ;
         '''
 
         return self._execute_query(query, (range_start_time, range_end_time))
 
-    def update_ec2_usage_quota(
+    def update_ec2_usage_quota_from_log(
         self,
-        user_data_model: dict[int, dict[str, list[tuple[str, datetime]] | time]],
+        range_start_time: datetime,
+        range_end_time: datetime,
+        maximum_quota: time,
+        education_window: Optional[tuple[datetime, datetime]]
+    ) -> Optional[int]:
+        '''CloudTrail 로그로부터 사용자별 잔여 할당량을 DB에서 계산하여 `ec2_usage_quota` 테이블에 바로 반영합니다.
+
+        `quota_updater.update_usage_quota()`와 같은 규칙으로 계산하며, 로그를 조회하지 않고 하나의 쿼리로 처리합니다.
+
+        - 인스턴스별로 상태가 바뀌는 로그만 남겨 사용 구간을 만듭니다.
+          (= 이미 실행 중인 인스턴스의 Start 로그와 실행 중이 아닌 인스턴스의 Stop 로그는 무시)
+        - 사용자별로 사용 구간을 시작 시각 순으로 정렬하여, 앞선 구간들의 종료 시각보다 늦게 시작하는 구간부터
+          새로운 사용 주기로 묶습니다. (= 겹치거나 맞닿은 구간 병합)
+        - 전날 종료된 사용 주기는 제외하고, 전날 시작된 사용 주기는 자정부터 사용한 것으로 계산합니다.
+        - 정규교육일에 정규교육시간 중 시작된 사용 주기는 차감하지 않고,
+          정규교육시간 전에 시작된 사용 주기는 정규교육시간 시작 시각까지만 차감합니다.
+
+        Args:
+            range_start_time: 조회할 로그의 시작 시각입니다.
+            range_end_time: 조회할 로그의 종료 시각이자, 잔여 할당량 계산의 기준 시각입니다.
+            maximum_quota: 오늘의 최대 할당량입니다.
+            education_window: 오늘의 정규교육시간 구간입니다. 정규교육일이 아니라면 None입니다.
+
+        Returns:
+            업데이트된 행의 수를 반환합니다. 실패 시 None을 반환합니다.
+        '''
+
+        query = '''
+            WITH log AS (
+                SELECT
+                    oi.owned_by AS iam_user_id
+                    , ct.instance_id
+                    , ct.log_type
+                    , ct.log_time
+                    , LAG(ct.log_type, 1, 'StopInstances') OVER (
+                        PARTITION BY ct.instance_id ORDER BY ct.log_time, ct.log_type
+                    ) AS prev_log_type
+                FROM
+                    cloudtrail_log AS ct
+                JOIN
+                    ownership_info AS oi
+                USING (instance_id)
+                WHERE
+                    (ct.log_time BETWEEN %(range_start_time)s AND %(range_end_time)s)
+                    AND (ct.log_type IN ('StartInstances', 'StopInstances'))
+            ), instance_interval AS (
+                SELECT
+                    iam_user_id
+                    , log_type
+                    , log_time AS start_time
+                    , LEAD(log_time, 1, %(range_end_time)s) OVER (
+                        PARTITION BY instance_id ORDER BY log_time, log_type
+                    ) AS stop_time
+                FROM
+                    log
+                WHERE
+                    log_type <> prev_log_type  -- 인스턴스 상태가 바뀌는 로그
+            ), merging_interval AS (
+                SELECT
+                    iam_user_id
+                    , start_time
+                    , stop_time
+                    , MAX(stop_time) OVER (
+                        PARTITION BY iam_user_id ORDER BY start_time, stop_time
+                        ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                    ) AS prev_stop_time
+                FROM
+                    instance_interval
+                WHERE
+                    log_type = 'StartInstances'
+            ), period_interval AS (
+                SELECT
+                    iam_user_id
+                    , start_time
+                    , stop_time
+                    , SUM(CASE WHEN start_time <= prev_stop_time THEN 0 ELSE 1 END) OVER (
+                        PARTITION BY iam_user_id ORDER BY start_time, stop_time
+                        ROWS UNBOUNDED PRECEDING
+                    ) AS period_no
+                FROM
+                    merging_interval
+            ), period AS (
+                SELECT
+                    iam_user_id
+                    , MIN(start_time) AS start_time
+                    , MAX(stop_time) AS stop_time
+                FROM
+                    period_interval
+                GROUP BY
+                    iam_user_id
+                    , period_no
+            ), usage AS (
+                SELECT
+                    iam_user_id
+                    , CASE
+                        WHEN stop_time < %(midnight)s
+                            THEN 0  -- 전날 종료된 사용 주기
+                        WHEN start_time < %(midnight)s
+                            THEN EXTRACT(EPOCH FROM stop_time - %(midnight)s)
+                        WHEN start_time < %(education_start_time)s::TIMESTAMP
+                            THEN EXTRACT(EPOCH FROM LEAST(stop_time, %(education_start_time)s::TIMESTAMP) - start_time)
+                        WHEN start_time < %(education_end_time)s::TIMESTAMP
+                            THEN 0
+                        ELSE EXTRACT(EPOCH FROM stop_time - start_time)
+                    END AS usage_seconds
+                FROM
+                    period
+            ), remaining AS (
+                SELECT
+                    iam_user_id
+                    , GREATEST(
+                        0,
+                        EXTRACT(EPOCH FROM %(maximum_quota)s::TIME) - COALESCE(SUM(u.usage_seconds), 0)
+                    ) AS remaining_seconds
+                FROM
+                    (SELECT DISTINCT iam_user_id FROM log) AS l
+                LEFT JOIN
+                    usage AS u
+                USING (iam_user_id)
+                GROUP BY
+                    iam_user_id
+            )
+            UPDATE
+                ec2_usage_quota
+            SET
+                remaining_time = MAKE_INTERVAL(secs => FLOOR(remaining.remaining_seconds)::DOUBLE PRECISION)::TIME
+            FROM
+                remaining
+            WHERE
+                ec2_usage_quota.iam_user_id = remaining.iam_user_id
+            ;
+        '''
+        range_end_time = range_end_time.replace(tzinfo=None)
+        education_start_time, education_end_time = education_window or (None, None)
+        params = {
+            'range_start_time': range_start_time.replace(tzinfo=None),
+            'range_end_time': range_end_time,
+            'midnight': range_end_time.replace(hour=0, minute=0, second=0, microsecond=0),
+            'education_start_time': education_start_time,
+            'education_end_time': education_end_time,
+            'maximum_quota': maximum_quota,
+        }
+
+        try:
+            with self._connect() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, params)
+
+                    return cur.rowcount
+        except psycopg.Error as e:
+            logging.error('인스턴스 사용량 계산 쿼리 실행 실패 | error: %s', e)
+
+        return None
+
+    def get_usage_quota_states(
+        self,
+        quota_date: date
+    ) -> Optional[dict[int, tuple[list[str], Optional[datetime], timedelta, datetime]]]:
+        '''`quota_date`의 사용자별 인스턴스 사용 할당량 계산 상태를 반환합니다.
+
+        Returns:
+            `{iam_user_id: (running_instance_ids, period_start_time, usage_time, processed_until)}` 형태로 반환합니다.
+            조회 실패 시 None을 반환합니다.
+        '''
+
+        query = '''
+            SELECT
+                iam_user_id
+                , running_instance_ids
+                , period_start_time
+                , usage_time
+                , processed_until
+            FROM
+                ec2_usage_quota_state
+            WHERE
+                quota_date = %s
+            ;
+        '''
+
+        fetched_data = self._execute_query(query, (quota_date,))
+
+        if fetched_data is None:
+            return None
+
+        return {d[0]: d[1:] for d in fetched_data}
+
+    def upsert_usage_quota_states(
+        self,
+        quota_date: date,
+        states: Iterable[tuple[int, list[str], Optional[datetime], timedelta, datetime]]
+    ) -> Optional[tuple[int, int]]:
+        '''사용자별 인스턴스 사용 할당량 계산 상태를 저장하고, 지난 날짜의 상태는 제거합니다.
+
+        Args:
+            quota_date: 상태의 기준 날짜입니다.
+            states: `(iam_user_id, running_instance_ids, period_start_time, usage_time, processed_until)` 형태의 데이터입니다.
+
+        Returns:
+            `(저장된 행의 수, 무시된 행의 수)`를 반환합니다. 실패 시 None을 반환합니다.
+        '''
+
+        staging_query = '''
+            CREATE TEMP TABLE
+                staging_ec2_usage_quota_state (
+                    LIKE ec2_usage_quota_state INCLUDING DEFAULTS
+                )
+            ON COMMIT DROP
+            ;
+        '''
+        copy_query = '''
+            COPY
+                staging_ec2_usage_quota_state (
+                    iam_user_id
+                    , quota_date
+                    , running_instance_ids
+                    , period_start_time
+                    , usage_time
+                    , processed_until
+                )
+            FROM
+                STDIN
+        '''
+        merge_query = '''
+            WITH deleted AS (
+                DELETE FROM
+                    ec2_usage_quota_state AS euqs
+                WHERE
+                    euqs.quota_date < (SELECT MIN(quota_date) FROM staging_ec2_usage_quota_state)
+                    AND NOT EXISTS (
+                        SELECT
+                            1
+                        FROM
+                            staging_ec2_usage_quota_state AS seuqs
+                        WHERE
+                            seuqs.iam_user_id = euqs.iam_user_id
+                    )
+            )
+            INSERT INTO
+                ec2_usage_quota_state
+            SELECT
+                *
+            FROM
+                staging_ec2_usage_quota_state
+            ON
+                CONFLICT (iam_user_id)
+            DO UPDATE SET
+                quota_date = EXCLUDED.quota_date
+                , running_instance_ids = EXCLUDED.running_instance_ids
+                , period_start_time = EXCLUDED.period_start_time
+                , usage_time = EXCLUDED.usage_time
+                , processed_until = EXCLUDED.processed_until
+                , updated_at = EXCLUDED.updated_at
+            ;
+        '''
+        rows = ((state[0], quota_date, *state[1:]) for state in states)
+
+        return self._bulk_merge(staging_query, copy_query, rows, merge_query)
+
+    def get_instance_cloudtrail_log(
+        self,
+        range_start_time: datetime,
+        range_end_time: datetime
+    ) -> Optional[list[tuple[int, str, str, datetime]]]:
+        '''특정 시간 범위에 생성된 CloudTrail 로그들을 인스턴스 ID와 함께 조회합니다.
+
+        Returns:
+            시간 순으로 정렬된 `(iam_user_id, instance_id, log_type, log_time)` 목록을 반환합니다.
+            소유자가 없는 인스턴스의 로그는 제외되며, 조회 실패 시 None을 반환합니다.
+        '''
+
+        query = '''
+            SELECT
+                oi.owned_by AS iam_user_id
+                , ct.instance_id
+                , ct.log_type
+                , ct.log_time
+            FROM
+                cloudtrail_log AS ct
+            JOIN
+                ownership_info AS oi
+            USING (instance_id)
+            WHERE
+                (ct.log_time BETWEEN %s AND %s)
+                AND (ct.log_type IN ('StartInstances', 'StopInstances'))
+            ORDER BY
+                ct.log_time ASC
+                , ct.log_type ASC
+                , ct.instance_id ASC
+            ;
+        '''
+
+        return self._execute_query(
+            query,
+            (range_start_time.replace(tzinfo=None), range_end_time.replace(tzinfo=None))
+        )
+
+    def get_all_remaining_usage_times(self) -> Optional[list[tuple[int, time]]]:
+        '''모든 사용자의 잔여 인스턴스 사용 할당량을 조회합니다.
+
+        Returns:
+            `(iam_user_id, remaining_time)` 목록을 반환합니다. 조회 실패 시 None을 반환합니다.
+        '''
+
+        query = '''
+            SELECT
+                iam_user_id
+                , remaining_time
+            FROM
+                ec2_usage_quota
+            ;
+        '''
+
+        return self._execute_query(query)
+
+    def upsert_student_quota_deadline(
+        self,
+        student_id: str,
+        deadline: datetime
     ) -> None:
-        '''사용자별 인스턴스 사용량을 업데이트합니다.'''
+        '''학생의 인스턴스 사용 할당량 소진 예정 시각을 저장합니다. 새로 저장된 시각에 대한 사전 안내는 다시 보냅니다.'''
+
+        query = '''
+            INSERT INTO
+                quota_deadline (iam_user_id, deadline)
+            SELECT
+                user_id
+                , %s
+            FROM
+                iam_user
+            WHERE
+                owned_by = %s
+            ON
+                CONFLICT (iam_user_id)
+            DO UPDATE SET
+                deadline = EXCLUDED.deadline
+                , warned_at = NULL
+                , updated_at = NOW()
+            ;
+        '''
+
+        self._execute_query(query, (deadline, student_id))
+
+    def delete_student_quota_deadline(
+        self,
+        student_id: str
+    ) -> None:
+        '''학생의 인스턴스 사용 할당량 소진 예정 시각을 제거합니다.'''
+
+        query = '''
+            DELETE FROM
+                quota_deadline
+            WHERE
+                iam_user_id IN (
+                    SELECT
+                        user_id
+                    FROM
+                        iam_user
+                    WHERE
+                        owned_by = %s
+                )
+            ;
+        '''
+
+        self._execute_query(query, (student_id,))
+
+    def sync_quota_deadlines(
+        self,
+        deadlines: Iterable[tuple[int, Optional[datetime]]],
+        settle_horizon: timedelta
+    ) -> Optional[tuple[int, int]]:
+        '''할당량 업데이트 결과로 계산한 사용자별 인스턴스 사용 할당량 소진 예정 시각을 반영합니다.
+
+        CloudTrail 로그는 늦게 적재되므로, `settle_horizon` 이내에 저장된 소진 예정 시각(e.g. `/start` 요청 시 저장)은
+        더 이른 시각만 반영하고, 목록에 없는(= 실행 중이 아닌) 사용자의 소진 예정 시각도 제거하지 않습니다.
+
+        Args:
+            deadlines: `(iam_user_id, deadline)` 형태의 데이터입니다. 오늘 소진되지 않는다면 `deadline`은 None입니다.
+            settle_horizon: 로그가 모두 적재되기까지 기다리는 시간입니다.
+
+        Returns:
+            `(반영된 행의 수, 무시된 행의 수)`를 반환합니다. 실패 시 None을 반환합니다.
+        '''
+
+        staging_query = '''
+            CREATE TEMP TABLE
+                staging_quota_deadline (
+                    iam_user_id     SMALLINT
+                    , deadline      TIMESTAMPTZ
+                )
+            ON COMMIT DROP
+            ;
+        '''
+        copy_query = '''
+            COPY
+                staging_quota_deadline (iam_user_id, deadline)
+            FROM
+                STDIN
+        '''
+        merge_query = '''
+            WITH deleted AS (
+                DELETE FROM
+                    quota_deadline AS qd
+                WHERE
+                    qd.updated_at < NOW() - %(settle_horizon)s
+                    AND NOT EXISTS (
+                        SELECT
+                            1
+                        FROM
+                            staging_quota_deadline AS sqd
+                        WHERE
+                            sqd.iam_user_id = qd.iam_user_id
+                            AND sqd.deadline IS NOT NULL
+                    )
+            )
+            INSERT INTO
+                quota_deadline (iam_user_id, deadline)
+            SELECT
+                iam_user_id
+                , deadline
+            FROM
+                staging_quota_deadline
+            WHERE
+                deadline IS NOT NULL
+            ON
+                CONFLICT (iam_user_id)
+            DO UPDATE SET
+                deadline = CASE
+                    WHEN quota_deadline.updated_at < NOW() - %(settle_horizon)s THEN EXCLUDED.deadline
+                    ELSE LEAST(quota_deadline.deadline, EXCLUDED.deadline)
+                END
+                , updated_at = NOW()
+            WHERE
+                -- 저장된 소진 예정 시각이 실제로 바뀌는 경우에만 갱신 (= `updated_at`이 계속 늦춰지지 않도록)
+                (
+                    quota_deadline.updated_at < NOW() - %(settle_horizon)s
+                    AND quota_deadline.deadline <> EXCLUDED.deadline
+                )
+                OR EXCLUDED.deadline < quota_deadline.deadline
+            ;
+        '''
+
+        return self._bulk_merge(
+            staging_query, copy_query, deadlines, merge_query,
+            {'settle_horizon': settle_horizon}
+        )
+
+    def get_quota_deadlines_before(
+        self,
+        until: datetime
+    ) -> Optional[list[tuple[int, str, datetime, Optional[datetime], list[str]]]]:
+        '''`until` 이전에 인스턴스 사용 할당량이 소진되는 사용자들을 소진 예정 시각 순으로 조회합니다.
+
+        Returns:
+            `(iam_user_id, slack_id, deadline, warned_at, 소유한 인스턴스 ID 목록)` 목록을 반환합니다.
+            조회 실패 시 None을 반환합니다.
+        '''
+
+        query = '''
+            SELECT
+                qd.iam_user_id
+                , s.slack_id
+                , qd.deadline
+                , qd.warned_at
+                , ARRAY_AGG(oi.instance_id ORDER BY oi.instance_id)
+            FROM
+                quota_deadline AS qd
+            JOIN
+                iam_user AS iu ON qd.iam_user_id = iu.user_id
+            JOIN
+                student AS s ON iu.owned_by = s.student_id
+            JOIN
+                ownership_info AS oi ON iu.user_id = oi.owned_by
+            WHERE
+                qd.deadline <= %s
+            GROUP BY
+                qd.iam_user_id
+                , s.slack_id
+            ORDER BY
+                qd.deadline ASC
+            ;
+        '''
+
+        return self._execute_query(query, (until,))
+
+    def mark_quota_deadline_warned(
+        self,
+        iam_user_id: int,
+        deadline: datetime
+    ) -> None:
+        '''소진 예정 시각이 `deadline`인 사용자에게 사전 안내를 보냈음을 기록합니다.'''
+
+        query = '''
+            UPDATE
+                quota_deadline
+            SET
+                warned_at = NOW()
+            WHERE
+                iam_user_id = %s
+                AND deadline = %s
+            ;
+        '''
+
+        self._execute_query(query, (iam_user_id, deadline))
+
+    def delete_quota_deadline(
+        self,
+        iam_user_id: int,
+        deadline: datetime
+    ) -> None:
+        '''할당량 소진을 처리한 사용자의 소진 예정 시각을 제거합니다. 그 사이 소진 예정 시각이 바뀌었다면 제거하지 않습니다.'''
+
+        query = '''
+            DELETE FROM
+                quota_deadline
+            WHERE
+                iam_user_id = %s
+                AND deadline = %s
+            ;
+        '''
+
+        self._execute_query(query, (iam_user_id, deadline))
+
+    def bulk_update_ec2_usage_quota(
+        self,
+        usage_quotas: Iterable[tuple[int, time]],
+    ) -> Optional[int]:
+        '''사용자별 잔여 할당량을 하나의 트랜잭션으로 일괄 반영합니다.
+
+        할당량 데이터는 COPY를 통해 세션 전용 임시 테이블로 스트리밍되며, 임시 테이블은 커밋 시 삭제됩니다.
+        따라서 cron 작업이 겹쳐 실행되어도 서로 충돌하지 않고, 다른 세션에서는 업데이트 전후의 상태만 조회됩니다.
+
+        Args:
+            usage_quotas: `(iam_user_id, remaining_time)` 형태의 데이터입니다.
+
+        Returns:
+            업데이트된 행의 수를 반환합니다. 실패 시 None을 반환합니다.
+        '''
 
         create_query = '''
-            CREATE TABLE
+            CREATE TEMP TABLE
                 temp_ec2_usage_quota (
                     iam_user_id     SMALLINT
                     , usage_quota   TIME
                 )
+            ON COMMIT DROP
             ;
         '''
-        insert_query = '''
-            INSERT INTO
-                temp_ec2_usage_quota
-            VALUES
-                (%s, %s)
-            ;
+        copy_query = '''
+            COPY
+                temp_ec2_usage_quota (iam_user_id, usage_quota)
+            FROM
+                STDIN
         '''
-        data_to_insert = [(k, v['usage_quota'])
-                          for k, v in user_data_model.items()]
         update_query = '''
             UPDATE
                 ec2_usage_quota
@@ -434,17 +1444,23 @@ class PSQLClient:
                 ec2_usage_quota.iam_user_id = temp_ec2_usage_quota.iam_user_id
             ;
         '''
-        drop_query = '''
-            DROP TABLE
-                temp_ec2_usage_quota
-            ;
-        '''
 
-        self._execute_query(create_query)
-        self._execute_query(
-            insert_query, (data_to_insert,), many=True)
-        self._execute_query(update_query)
-        self._execute_query(drop_query)
+        try:
+            with self._connect() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(create_query)
+
+                    with cur.copy(copy_query) as copy:
+                        for row in usage_quotas:
+                            copy.write_row(row)
+
+                    cur.execute(update_query)
+
+                    return cur.rowcount
+        except psycopg.Error as e:
+            logging.error('인스턴스 사용량 일괄 업데이트 실패 | error: %s', e)
+
+        return None
 
     def get_iam_user_name(
         self,
@@ -514,6 +1530,37 @@ class PSQLClient:
 
         return fetched_data
 
+    def get_slack_id_and_running_instance_id_with_no_remaining_time(
+        self
+    ) -> Optional[list[tuple[str, str]]]:
+        '''ec2 사용시간을 모두 사용한 학생의 슬랙 아이디와, 소유한 인스턴스 중 실행 중인 인스턴스들을 추출합니다.
+
+        인스턴스 상태는 `instance_inventory` 테이블을 기준으로 합니다.
+        '''
+
+        query = '''
+            SELECT
+                s.slack_id, oi.instance_id
+            FROM
+                student AS s
+            JOIN
+                iam_user AS iu ON s.student_id = iu.owned_by
+            JOIN
+                ownership_info AS oi ON iu.user_id = oi.owned_by
+            JOIN
+                ec2_usage_quota AS euq ON iu.user_id = euq.iam_user_id
+            JOIN
+                instance_inventory AS ii ON oi.instance_id = ii.instance_id
+            WHERE
+                euq.remaining_time = '00:00:00'
+                AND ii.instance_state = 'running'
+            ;
+        '''
+
+        fetched_data = self._execute_query(query)
+
+        return fetched_data
+
     def get_student_name(
         self,
         slack_id: str
@@ -0,0 +1,206 @@
+'''인스턴스 사용 구간(interval)으로 사용 시간을 계산하는 모듈입니다.
+
+사용자가 여러 인스턴스를 동시에 실행하더라도 겹치는 시간은 한 번만 계산되도록,
+인스턴스별 사용 구간을 만든 뒤 사용자별로 겹치는 구간들을 병합하여 사용 시간을 계산합니다.
+병합된 구간에는 할당량 업데이트 작업(`tasks/cronjobs/quota_updater.py`)과 같은 보정 규칙을 적용합니다.
+'''
+
+
+from datetime import datetime, time, timedelta
+from typing import Iterable, Optional
+
+import holidays
+
+
+Interval = tuple[datetime, datetime]
+
+# 정규교육일의 정규교육시간에는 인스턴스 사용 할당량이 차감되지 않음
+EDUCATION_START_TIME = time(8, 30)
+EDUCATION_END_TIME = time(18, 0)
+
+
+def build_instance_intervals(
+    logs: Iterable[tuple[str, str, datetime]],
+    end_time: datetime
+) -> dict[str, list[Interval]]:
+    '''시간 순으로 정렬된 `(instance_id, log_type, log_time)` 로그로 인스턴스별 사용 구간을 만듭니다.
+
+    이미 실행 중인 인스턴스의 Start 로그와 실행 중이 아닌 인스턴스의 Stop 로그는 무시하며,
+    아직 중지되지 않은 인스턴스는 `end_time`까지 사용한 것으로 봅니다.
+    '''
+
+    intervals = {}
+    started_at = {}
+
+    for instance_id, log_type, log_time in logs:
+        if log_type == 'StartInstances':
+            started_at.setdefault(instance_id, log_time)
+        elif instance_id in started_at:
+            intervals.setdefault(instance_id, []).append(
+                (started_at.pop(instance_id), log_time))
+
+    for instance_id, start_time in started_at.items():
+        intervals.setdefault(instance_id, []).append((start_time, end_time))
+
+    return intervals
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> list[Interval]:
+    '''겹치거나 맞닿은 구간들을 하나로 병합합니다.
+
+    구간들을 시작 시각 순으로 정렬한 뒤 한 번만 순회합니다. (O(n log n))
+    '''
+
+    merged = []
+
+    for start_time, end_time in sorted(intervals):
+        if merged and start_time <= merged[-1][1]:
+            if end_time > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end_time)
+        else:
+            merged.append((start_time, end_time))
+
+    return merged
+
+
+def get_period_usage_time(interval: Interval, now_dt: datetime) -> timedelta:
+    '''병합된 사용 구간 하나를 할당량 업데이트 작업(`tasks/cronjobs/quota_updater.py`)과 같은 규칙으로 보정한 사용 시간을 반환합니다.
+
+    - 전날 시작된 구간은 자정부터 사용한 것으로 봅니다.
+    - 정규교육일에 정규교육시간 전에 시작된 구간은 정규교육시간 시작 시각까지만 사용한 것으로 봅니다.
+    - 정규교육일에 정규교육시간 중에 시작된 구간은 사용 시간에서 제외합니다.
+    '''
+
+    start_time, stop_time = interval
+    midnight = now_dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    education_window = get_education_window(now_dt)
+
+    if stop_time < midnight:
+        return timedelta()
+
+    if start_time < midnight:
+        start_time = midnight
+    elif education_window is not None:
+        if start_time < education_window[0]:
+            stop_time = min(stop_time, education_window[0])
+        elif start_time < education_window[1]:
+            return timedelta()
+
+    return stop_time - start_time
+
+
+def calculate_usage_time(intervals: Iterable[Interval], now_dt: datetime) -> timedelta:
+    '''구간들을 병합한 뒤, 병합된 구간마다 `get_period_usage_time()`의 규칙을 한 번씩 적용하여 오늘의 사용 시간을 계산합니다.'''
+
+    return sum(
+        (get_period_usage_time(interval, now_dt) for interval in merge_intervals(intervals)),
+        timedelta()
+    )
+
+
+def build_user_intervals(
+    logs: Iterable[tuple[int, str, str, datetime]],
+    end_time: datetime
+) -> dict[int, list[Interval]]:
+    '''시간 순으로 정렬된 `(iam_user_id, instance_id, log_type, log_time)` 로그로 사용자별 인스턴스 사용 구간을 만듭니다.
+
+    구간은 병합되지 않은 상태이며, 아직 중지되지 않은 인스턴스는 `end_time`까지 사용한 것으로 봅니다.
+    '''
+
+    user_logs = {}
+
+    for iam_user_id, instance_id, log_type, log_time in logs:
+        user_logs.setdefault(iam_user_id, []).append((instance_id, log_type, log_time))
+
+    return {
+        iam_user_id: [
+            interval
+            for instance_intervals in build_instance_intervals(instance_logs, end_time).values()
+            for interval in instance_intervals
+        ]
+        for iam_user_id, instance_logs in user_logs.items()
+    }
+
+
+def calculate_user_usage_times(
+    logs: Iterable[tuple[int, str, str, datetime]],
+    now_dt: datetime
+) -> dict[int, timedelta]:
+    '''시간 순으로 정렬된 `(iam_user_id, instance_id, log_type, log_time)` 로그로 사용자별 오늘의 사용 시간을 계산합니다.
+
+    아직 중지되지 않은 인스턴스는 `now_dt`까지 사용한 것으로 봅니다.
+    '''
+
+    return {
+        iam_user_id: calculate_usage_time(intervals, now_dt)
+        for iam_user_id, intervals in build_user_intervals(logs, now_dt).items()
+    }
+
+
+def get_running_period_start_times(logs: Iterable[tuple[int, str, str, datetime]]) -> dict[int, datetime]:
+    '''시간 순으로 정렬된 `(iam_user_id, instance_id, log_type, log_time)` 로그로 인스턴스를 실행 중인 사용자별 현재 사용 주기의 시작 시각을 반환합니다.
+
+    사용 주기는 사용자의 인스턴스 사용 구간들을 병합한 구간으로, 할당량 업데이트 작업의 사용 주기와 같습니다.
+    '''
+
+    period_start_times = {}
+
+    for iam_user_id, intervals in build_user_intervals(logs, datetime.max).items():
+        periods = merge_intervals(intervals)
+
+        # 아직 중지되지 않은 인스턴스가 있다면 마지막 사용 주기가 끝나지 않음
+        if periods and periods[-1][1] == datetime.max:
+            period_start_times[iam_user_id] = periods[-1][0]
+
+    return period_start_times
+
+
+def get_education_window(dt: datetime) -> Optional[Interval]:
+    '''`dt`가 정규교육일(공휴일이 아닌 평일)이면 그날의 정규교육시간 구간을 반환하고, 아니면 None을 반환합니다.'''
+
+    kr_holidays = holidays.country_holidays('KR', years=dt.year)
+
+    if dt.weekday() >= 5 or dt in kr_holidays:
+        return None
+
+    return (
+        dt.replace(hour=EDUCATION_START_TIME.hour, minute=EDUCATION_START_TIME.minute, second=0, microsecond=0),
+        dt.replace(hour=EDUCATION_END_TIME.hour, minute=EDUCATION_END_TIME.minute, second=0, microsecond=0),
+    )
+
+
+def get_quota_deadline(
+    now_dt: datetime,
+    remaining_time: time,
+    period_start_time: datetime
+) -> Optional[datetime]:
+    '''`period_start_time`에 시작된 사용 주기를 이어갈 때 잔여 할당량이 모두 소진되는 시각을 반환합니다.
+
+    `get_period_usage_time()`과 같은 규칙으로 사용 시간이 늘어나는 동안에만 할당량이 소진됩니다.
+    할당량은 자정에 초기화되므로, 자정이 되기 전에 소진되지 않으면 None을 반환합니다.
+    '''
+
+    # 로그 시각과 같은 한국 시간 기준으로 비교
+    now_time = now_dt.replace(tzinfo=None)
+    period_start_time = period_start_time.replace(tzinfo=None)
+    midnight = now_time.replace(hour=0, minute=0, second=0, microsecond=0)
+    remaining_time = timedelta(
+        hours=remaining_time.hour, minutes=remaining_time.minute, seconds=remaining_time.second)
+    depletion_time = now_time + remaining_time
+
+    if remaining_time == timedelta():  # 이미 할당량을 모두 사용한 경우
+        return now_dt
+
+    if depletion_time >= midnight + timedelta(days=1):
+        return None
+
+    education_window = get_education_window(now_time)
+
+    if education_window is not None and period_start_time >= midnight:
+        if period_start_time < education_window[0]:  # 정규교육시간 시작 시각까지만 사용 시간이 늘어남
+            if depletion_time > education_window[0]:
+                return None
+        elif period_start_time < education_window[1]:  # 사용 시간이 늘어나지 않음
+            return None
+
+    return now_dt + remaining_time
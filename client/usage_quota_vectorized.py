@@ -0,0 +1,116 @@
+'''인스턴스 사용 할당량을 NumPy 배열 연산으로 계산하는 모듈입니다.
+
+할당량 업데이트 작업(`tasks/cronjobs/quota_updater.py`)의 `full` 엔진과 같은 규칙으로 계산하며,
+로그를 하나씩 순회하지 않으므로 로그가 많은 날에 사용합니다. (`numpy` 패키지 필요)
+'''
+
+
+from datetime import datetime, time, timedelta
+
+import numpy as np
+
+from client.usage_intervals import get_education_window
+
+
+def calculate_usage_quota_vectorized(
+    cloudtrail_log: list[tuple[int, str, str, datetime]],
+    now_dt: datetime,
+    maximum_quota: time
+) -> dict[int, time]:
+    '''할당량 업데이트 작업(`tasks/cronjobs/quota_updater.py`)과 같은 규칙으로 사용자별 잔여 할당량을 NumPy 배열 연산으로 계산합니다.
+
+    인스턴스별 사용 구간을 사용자별로 병합한 뒤 병합된 구간마다 보정 규칙을 적용하는 과정을
+    로그를 하나씩 순회하지 않고 정렬과 누적 연산으로 처리하므로, 로그가 많은 날(e.g. 10만 건)에도 빠르게 계산할 수 있습니다.
+
+    Args:
+        cloudtrail_log: `PSQLClient.get_instance_cloudtrail_log()`가 반환한, 시간 순으로 정렬된 로그입니다.
+        now_dt: 잔여 할당량 계산의 기준 시각입니다.
+        maximum_quota: 오늘의 최대 할당량입니다.
+
+    Returns:
+        `{iam_user_id: 잔여 할당량}` 형태로 반환합니다.
+    '''
+
+    if not cloudtrail_log:
+        return {}
+
+    # 마이크로초 단위로 계산
+    epoch, microsecond = datetime(1970, 1, 1), timedelta(microseconds=1)
+    now = now_dt.replace(tzinfo=None)
+    now_time = (now - epoch) // microsecond
+
+    log_cnt = len(cloudtrail_log)
+    iam_user_ids = np.fromiter((log[0] for log in cloudtrail_log), dtype=np.int64, count=log_cnt)
+    _, instance_codes = np.unique([log[1] for log in cloudtrail_log], return_inverse=True)
+    is_start = np.fromiter(
+        (log[2] == 'StartInstances' for log in cloudtrail_log), dtype=bool, count=log_cnt)
+    log_times = np.fromiter(
+        ((log[3] - epoch) // microsecond for log in cloudtrail_log), dtype=np.int64, count=log_cnt)
+    users = np.unique(iam_user_ids)  # 사용 구간이 없는 사용자도 결과에 포함
+
+    # 인스턴스별로 상태가 바뀌는 로그만 남김 (= 이미 실행 중인 인스턴스의 Start 로그와 실행 중이 아닌 인스턴스의 Stop 로그는 무시)
+    order = np.argsort(instance_codes, kind='stable')  # 인스턴스별 로그의 시간 순서는 유지
+    instance_codes, iam_user_ids, is_start, log_times = \
+        instance_codes[order], iam_user_ids[order], is_start[order], log_times[order]
+    prev_is_start = np.r_[False, is_start[:-1]]
+    prev_is_start[np.r_[True, instance_codes[1:] != instance_codes[:-1]]] = False
+    is_changed = is_start != prev_is_start
+    instance_codes, iam_user_ids, is_start, log_times = \
+        instance_codes[is_changed], iam_user_ids[is_changed], is_start[is_changed], log_times[is_changed]
+
+    # 남은 로그는 인스턴스별로 Start, Stop이 번갈아 나타나므로, Start 로그와 다음 로그로 사용 구간을 만듦
+    start_idx = np.flatnonzero(is_start)
+    has_stop = np.r_[instance_codes[1:] == instance_codes[:-1], False][start_idx]
+    user_codes = np.searchsorted(users, iam_user_ids[start_idx])
+    start_times = log_times[start_idx]
+    stop_times = np.where(
+        has_stop, log_times[np.minimum(start_idx + 1, len(log_times) - 1)], now_time)  # 중지되지 않은 인스턴스는 현재 시각까지
+
+    # 사용자별로 구간을 시작 시각 순으로 정렬하여, 앞선 구간들의 종료 시각보다 늦게 시작하는 구간부터 새로운 사용 주기로 묶음
+    order = np.lexsort((stop_times, start_times, user_codes))
+    user_codes, start_times, stop_times = user_codes[order], start_times[order], stop_times[order]
+    is_first_interval = np.r_[True, user_codes[1:] != user_codes[:-1]]
+
+    # 뒤쪽 사용자일수록 큰 값을 더해, 누적 최댓값이 사용자 구간마다 새로 시작되도록 함
+    base_time = start_times.min(initial=now_time)
+    offsets = user_codes * (now_time - base_time + 1)
+    running_max = np.maximum.accumulate(stop_times - base_time + offsets) - offsets
+    prev_max = np.r_[0, running_max[:-1]]
+    is_period_start = is_first_interval | (start_times - base_time > prev_max)
+
+    period_idx = np.flatnonzero(is_period_start)
+    period_users = user_codes[period_idx]
+    period_starts = start_times[period_idx]
+    period_stops = np.maximum.reduceat(stop_times, period_idx) if len(period_idx) else stop_times
+
+    # 병합된 구간마다 보정 규칙 적용 (`client.usage_intervals.get_period_usage_time()`)
+    midnight = (now.replace(hour=0, minute=0, second=0, microsecond=0) - epoch) // microsecond
+    usage_times = np.where(
+        period_starts < midnight,
+        period_stops - midnight,  # 전날 시작된 사용 주기는 자정부터 계산
+        period_stops - period_starts
+    )
+    education_window = get_education_window(now)
+
+    if education_window is not None:
+        education_start, education_end = ((t - epoch) // microsecond for t in education_window)
+        is_today = period_starts >= midnight
+        usage_times = np.where(
+            is_today & (period_starts < education_start),
+            np.minimum(period_stops, education_start) - period_starts,  # 정규교육시간 시작 시각까지만 계산
+            usage_times
+        )
+        usage_times[is_today & (period_starts >= education_start) & (period_starts < education_end)] = 0
+
+    usage_times[period_stops < midnight] = 0  # 전날 종료된 사용 주기
+
+    total_usage_times = np.zeros(len(users), dtype=np.int64)
+    np.add.at(total_usage_times, period_users, usage_times)
+    maximum_quota_time = timedelta(
+        hours=maximum_quota.hour, minutes=maximum_quota.minute, seconds=maximum_quota.second) // microsecond
+    remaining_seconds = np.maximum(0, maximum_quota_time - total_usage_times) // 1_000_000  # 초 미만은 버림
+
+    return {
+        int(iam_user_id): (datetime.min + timedelta(seconds=int(seconds))).time()
+        for iam_user_id, seconds in zip(users, remaining_seconds)
+    }
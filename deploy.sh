@@ -19,5 +19,8 @@ eval "$(pyenv virtualenv-init -)"
 pyenv activate deploy
 pip install -r requirements.txt
 
+# Share the EC2 inventory cache between gunicorn workers
+export AWS_MANAGER_INVENTORY_SNAPSHOT_PATH=/tmp/aws-manager-inventory.sqlite3
+
 # Deploy the service
 nohup gunicorn --workers 2 --bind 127.0.0.1:4202 app:app >> deploy.log 2>&1 &
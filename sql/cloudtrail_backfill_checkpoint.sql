@@ -0,0 +1,10 @@
+-- CloudTrail 로그 backfill 작업(`tasks/cronjobs/cloudtrail_log_backfill.py`)의 구간별 완료 기록입니다.
+CREATE TABLE IF NOT EXISTS cloudtrail_backfill_checkpoint (
+    event_name          VARCHAR(32)     NOT NULL
+    , slice_start       TIMESTAMPTZ     NOT NULL
+    , slice_end         TIMESTAMPTZ     NOT NULL
+    , inserted_cnt      INTEGER         NOT NULL
+    , duplicated_cnt    INTEGER         NOT NULL
+    , completed_at      TIMESTAMPTZ     NOT NULL    DEFAULT NOW()
+    , PRIMARY KEY (event_name, slice_start, slice_end)
+);
@@ -0,0 +1,7 @@
+-- CloudTrail 로그 수집 파이프라인(`tasks/cronjobs/cloudtrail_log_pipeline.py`)의 이벤트별 수집 위치입니다.
+-- `fetched_until`은 오류 없이 조회를 마친 구간의 끝 시각입니다.
+CREATE TABLE IF NOT EXISTS cloudtrail_log_watermark (
+    event_name          VARCHAR(32)     PRIMARY KEY
+    , fetched_until     TIMESTAMPTZ     NOT NULL
+    , updated_at        TIMESTAMPTZ     NOT NULL    DEFAULT NOW()
+);
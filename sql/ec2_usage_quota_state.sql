@@ -0,0 +1,15 @@
+-- 인스턴스 사용 할당량 계산(`tasks/cronjobs/quota_updater.py`의 incremental 엔진)의 사용자별 상태입니다.
+-- `processed_until`까지의 `cloudtrail_log`가 반영된 상태이며, `quota_date`가 오늘이 아닌 상태는 사용되지 않습니다.
+CREATE TABLE IF NOT EXISTS ec2_usage_quota_state (
+    iam_user_id             SMALLINT    PRIMARY KEY
+    , quota_date            DATE        NOT NULL
+    , running_instance_ids  TEXT[]      NOT NULL
+    , period_start_time     TIMESTAMP
+    , usage_time            INTERVAL    NOT NULL
+    , processed_until       TIMESTAMP   NOT NULL
+    , updated_at            TIMESTAMPTZ NOT NULL    DEFAULT NOW()
+);
+
+-- 마지막으로 반영된 이후의 로그만 조회
+CREATE INDEX IF NOT EXISTS cloudtrail_log_log_time_idx
+    ON cloudtrail_log (log_time);
@@ -0,0 +1,19 @@
+-- 인스턴스 정보 스냅샷 작업(`tasks/cronjobs/instance_inventory_snapshot.py`)이 적재하는 전체 인스턴스의 정보입니다.
+-- `observed_at`은 해당 정보를 관측한 시각으로, 더 오래된 관측 결과로 덮어쓰지 않기 위해 사용합니다.
+CREATE TABLE IF NOT EXISTS instance_inventory (
+    instance_id                 VARCHAR(32)     PRIMARY KEY
+    , instance_state            VARCHAR(16)     NOT NULL
+    , name                      TEXT
+    , public_ip_address         VARCHAR(15)
+    , private_ip_address        VARCHAR(15)
+    , launch_time               TIMESTAMPTZ
+    , state_transition_time     TIMESTAMPTZ
+    , observed_at               TIMESTAMPTZ     NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS instance_inventory_instance_state_idx
+    ON instance_inventory (instance_state);
+
+-- 사용자별 소유 인스턴스 조회(`ownership_info` JOIN `instance_inventory`)를 위한 인덱스
+CREATE INDEX IF NOT EXISTS ownership_info_owned_by_idx
+    ON ownership_info (owned_by);
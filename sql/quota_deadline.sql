@@ -0,0 +1,12 @@
+-- 실행 중인 사용자별 인스턴스 사용 할당량 소진 예정 시각입니다. (`tasks/quota_enforcer.py`가 소진 시각에 인스턴스를 중지)
+-- `/start` 요청과 할당량 업데이트(`tasks/cronjobs/quota_updater.py`) 시 갱신되며, `warned_at`은 사전 안내를 보낸 시각입니다.
+CREATE TABLE IF NOT EXISTS quota_deadline (
+    iam_user_id     SMALLINT        PRIMARY KEY
+    , deadline      TIMESTAMPTZ     NOT NULL
+    , warned_at     TIMESTAMPTZ
+    , updated_at    TIMESTAMPTZ     NOT NULL    DEFAULT NOW()
+);
+
+-- 가장 가까운 소진 예정 시각부터 조회
+CREATE INDEX IF NOT EXISTS quota_deadline_deadline_idx
+    ON quota_deadline (deadline);
@@ -1,8 +1,24 @@
-'''EIP 주소를 생성하여 시작/중지 상태인 모든 EC2 인스턴스에 하나씩 할당합니다.'''
+'''시작/중지 상태인 모든 EC2 인스턴스에 EIP 주소를 하나씩 할당합니다.
+
+기본(`reconcile`) 모드는 EIP 주소가 연결되지 않은 인스턴스에만 주소를 연결하므로 여러 번 실행해도 안전합니다.
+`allocate` 모드는 기존 동작과 같이 모든 인스턴스에 새로운 EIP 주소를 생성하여 연결합니다.
+
+Example:
+    $ python associate_eip_to_instance.py --mode reconcile
+'''
 
 
 import os
 import sys
+import logging
+import argparse
+
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s',
+    handlers=[logging.FileHandler('associate_eip_to_instance.log', mode='a')]
+)
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 app_dir = os.path.abspath(os.path.join(current_dir, '..'))
@@ -13,11 +29,31 @@ sys.path.append(app_dir)
 if __name__ == '__main__':
     from client.aws_client import EC2Client
 
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument(
+        '--mode', choices=['reconcile', 'allocate'], default='reconcile',
+        help='reconcile: 주소가 없는 인스턴스에만 연결 (기본값), allocate: 모든 인스턴스에 새로 생성하여 연결')
+    args = parser.parse_args()
+
     ec2_client = EC2Client()
     instance_id_list = ec2_client.get_live_instance_id_list(
         ['running', 'stopped'])
-    allocation_id_list = ec2_client.allocate_eip_address(
-        len(instance_id_list)
-    )
 
-    ec2_client.associate_eip_address(instance_id_list, allocation_id_list)
+    if args.mode == 'allocate':
+        allocation_id_list = ec2_client.allocate_eip_address(
+            len(instance_id_list)
+        )
+
+        ec2_client.associate_eip_address(instance_id_list, allocation_id_list)
+        sys.exit(0)
+
+    results = ec2_client.reconcile_eip_addresses(instance_id_list)
+
+    if results is None:
+        sys.exit(1)
+
+    failed_results = {i: error_code for i, error_code in results.items() if error_code}
+    logging.info('EIP 주소 연결: %s개 | 실패: %s', len(results) - len(failed_results), failed_results)
+
+    if failed_results:
+        sys.exit(1)
@@ -0,0 +1,219 @@
+'''지정된 기간의 CloudTrail 로그를 다시 수집하여 `cloudtrail_log` 테이블을 복구합니다.
+
+장애 등으로 누락된 구간을 복구할 때 수동으로 실행합니다.
+기간을 일정한 크기의 구간으로 나누어 여러 스레드에서 동시에 수집하며, 모든 `lookup_events()` 호출은 하나의 호출 제한을 공유합니다.
+수집이 완료된 구간은 DB에 기록되므로, 작업이 중단되더라도 다시 실행하면 완료되지 않은 구간부터 이어서 수집합니다.
+로그는 중복을 무시하고 적재되므로 같은 구간을 여러 번 수집해도 안전합니다.
+
+Example:
+    $ python cloudtrail_log_backfill.py --start 2024-05-01 --end 2024-05-08
+'''
+
+
+import os
+import sys
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+from pytz import timezone
+
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s',
+    handlers=[
+        logging.FileHandler('cloudtrail_log_backfill.log', mode='a'),
+    ],
+)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+app_dir = os.path.abspath(os.path.join(current_dir, '..', '..'))
+
+sys.path.append(app_dir)
+
+
+def split_time_range(
+    start_time: datetime,
+    end_time: datetime,
+    slice_size: timedelta
+) -> list[tuple[datetime, datetime]]:
+    '''시간 범위를 `slice_size` 크기의 구간들로 나눕니다.'''
+
+    slices = []
+    slice_start = start_time
+
+    while slice_start < end_time:
+        slice_end = min(slice_start + slice_size, end_time)
+        slices.append((slice_start, slice_end))
+        slice_start = slice_end
+
+    return slices
+
+
+def backfill_slice(
+    cloudtrail_client,
+    psql_client,
+    event_name: str,
+    slice_start: datetime,
+    slice_end: datetime,
+    instance_ids: set[str]
+) -> Optional[tuple[int, int]]:
+    '''하나의 구간에 대한 로그를 수집하여 적재하고, 완료 기록을 저장합니다.
+
+    Returns:
+        `(적재된 행의 수, 중복으로 무시된 행의 수)`를 반환합니다. 실패 시 None을 반환합니다.
+    '''
+
+    pages = cloudtrail_client.iter_event_log_pages(
+        event_name, slice_start, slice_end)
+    logs_to_insert = (
+        log
+        for events, _ in pages
+        for log in parsing_ec2_logs(events)
+        if log[0] in instance_ids
+    )
+
+    try:
+        insert_result = insert_logs_in_batches(psql_client, logs_to_insert)
+    except (ClientError, BotoCoreError) as e:
+        logging.error(
+            '구간 로그 조회 실패 | %s | %s ~ %s | %s',
+            event_name,
+            slice_start,
+            slice_end,
+            e
+        )
+
+        return None
+
+    if insert_result is None:
+        return None
+
+    psql_client.insert_backfill_checkpoint(
+        event_name, slice_start, slice_end, insert_result)
+
+    return insert_result
+
+
+def parse_args() -> argparse.Namespace:
+    '''커맨드라인 인자를 파싱합니다.'''
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument(
+        '--start', required=True,
+        help='수집 시작 일시 (Asia/Seoul 기준, 예: 2024-05-01 또는 2024-05-01T09:00)')
+    parser.add_argument(
+        '--end', required=True,
+        help='수집 종료 일시 (Asia/Seoul 기준, 해당 시각은 포함되지 않음)')
+    parser.add_argument(
+        '--slice-hours', type=float, default=6,
+        help='한 번에 수집할 구간의 크기(시간) (기본값: 6)')
+    parser.add_argument(
+        '--workers', type=int, default=4,
+        help='동시에 수집할 구간의 수 (기본값: 4)')
+    parser.add_argument(
+        '--rate', type=float, default=1.5,
+        help='초당 `lookup_events()` 호출 횟수 (기본값: 1.5, 정기 수집 작업을 위해 여유를 남겨둠)')
+    parser.add_argument(
+        '--event-names', nargs='+', default=list(EVENT_NAMES),
+        help='수집할 이벤트 이름 목록 (기본값: %(default)s)')
+
+    return parser.parse_args()
+
+
+def main() -> bool:
+    '''backfill 작업을 수행하는 main 함수입니다.'''
+
+    args = parse_args()
+    kst = timezone('Asia/Seoul')
+    start_time = kst.localize(datetime.fromisoformat(args.start))
+    end_time = kst.localize(datetime.fromisoformat(args.end))
+
+    # 계정 단위 호출 제한(초당 2회)은 모든 프로세스가 공유하며, 이 작업은 그중 `args.rate`까지만 사용
+    cloudtrail_client = CloudTrailClient(  # pylint: disable=used-before-assignment
+        max_lookup_rate=args.rate, caller='cloudtrail-backfill')
+    psql_client = PSQLClient()  # pylint: disable=used-before-assignment
+
+    completed_slices = psql_client.get_completed_backfill_slices(
+        start_time, end_time)
+    instance_ids = {d[0] for d in psql_client.check_existed_instance_id() or []}
+
+    if completed_slices is None or not instance_ids:
+        logging.error('backfill 작업에 필요한 데이터 조회 실패')
+
+        return False
+
+    slices_to_fetch = [
+        (event_name, slice_start, slice_end)
+        for event_name in args.event_names
+        for slice_start, slice_end in split_time_range(
+            start_time, end_time, timedelta(hours=args.slice_hours))
+        if (event_name, slice_start, slice_end) not in completed_slices
+    ]
+    logging.info(
+        'backfill 작업 시작 | %s ~ %s | 수집할 구간: %s개 | 완료된 구간: %s개',
+        start_time,
+        end_time,
+        len(slices_to_fetch),
+        len(completed_slices)
+    )
+
+    failed_slices = []
+    inserted_cnt, duplicated_cnt = 0, 0
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(
+                backfill_slice,
+                cloudtrail_client,
+                psql_client,
+                *s,
+                instance_ids
+            ): s
+            for s in slices_to_fetch
+        }
+
+        for future in as_completed(futures):
+            insert_result = future.result()
+
+            if insert_result is None:
+                failed_slices.append(futures[future])
+
+                continue
+
+            inserted_cnt += insert_result[0]
+            duplicated_cnt += insert_result[1]
+            logging.info(
+                '구간 수집 완료 | %s | %s ~ %s | 적재: %s건 | 중복: %s건',
+                *futures[future],
+                *insert_result
+            )
+
+    logging.info(
+        'backfill 작업 종료 | 적재: %s건 | 중복: %s건 | 실패한 구간: %s개',
+        inserted_cnt,
+        duplicated_cnt,
+        len(failed_slices)
+    )
+
+    return not failed_slices
+
+
+if __name__ == '__main__':
+    from client.aws_client import CloudTrailClient
+    from client.psql_client import PSQLClient
+    from tasks.cronjobs.cloudtrail_log_pipeline import (
+        EVENT_NAMES,
+        insert_logs_in_batches,
+        parsing_ec2_logs,
+    )
+
+    if not main():
+        logging.error('CloudTrail 로그 backfill 작업 실패 (다시 실행하면 실패한 구간부터 수집합니다)')
+        sys.exit(1)
+
+    logging.info('CloudTrail 로그 backfill 작업 완료')
@@ -1,13 +1,33 @@
 '''5분마다 AWS CloudTrail API를 호출하여 StopInstances, StartInstances, RunInstances 로그 정보를 수집하고 DB에 적재합니다.
 
-데이터 누락 방지를 위해 로그 수집 시간 간격을 10분으로 설정하였습니다. 
+이벤트별 수집 위치(high-water mark, 오류 없이 조회를 마친 구간의 끝 시각)를 DB에 저장하고,
+매 실행마다 해당 위치 이후의 로그만 수집합니다. cron 작업이 누락되더라도 다음 실행에서 누락된 구간을 자동으로 수집합니다.
+소유 정보(`ownership_info`)가 늦게 적재된 인스턴스의 로그도 수집할 수 있도록, 수집 위치 10분 전부터 다시 조회합니다.
+(다시 조회된 로그 중 이미 적재된 로그는 중복으로 무시됩니다.)
+CloudTrail 이벤트의 전달 지연을 고려하여, 현재 시각으로부터 5분 이전까지의 로그만 수집합니다.
+
+`--log-dir` 또는 `--s3-uri` 옵션을 지정하면 API 대신 CloudTrail이 S3로 전달한 로그 파일(`*.json.gz`)에서 로그를 수집합니다.
+API 호출 제한 없이 대량의 로그를 적재할 수 있으므로 backfill 작업에 사용합니다.
+
+Example:
+    $ python cloudtrail_log_pipeline.py
+    $ python cloudtrail_log_pipeline.py --log-dir ./AWSLogs/123456789012/CloudTrail/ap-northeast-2/2024/05/01
+    $ python cloudtrail_log_pipeline.py --s3-uri s3://cloudtrail-bucket/AWSLogs/123456789012/CloudTrail/ap-northeast-2/2024/05/
 '''
 
 
 import os
+import io
+import gzip
+import json
 import logging
 import sys
+import argparse
 from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional
+from urllib.parse import urlparse
 
 import pytz
 
@@ -27,11 +47,12 @@ sys.path.append(app_dir)
 
 
 def parsing_ec2_logs(
-    logs: list[dict]
-) -> list[tuple[str, str, datetime]]:
-    '''Log에서 EventName, EventTime, Instance ID 정보만 추출합니다.'''
+    logs: Iterable[dict]
+) -> Iterator[tuple[str, str, datetime]]:
+    '''Log에서 EventName, EventTime, Instance ID 정보만 추출합니다.
 
-    logs_list = []
+    로그를 순회하며 바로 결과를 반환하므로, 로그 스트림을 그대로 입력할 수 있습니다.
+    '''
 
     for log in logs:
         log_type = log.get('EventName')
@@ -40,66 +61,309 @@ def parsing_ec2_logs(
         for resource in log['Resources']:
             if resource['ResourceType'] == 'AWS::EC2::Instance':
                 instance_id = resource['ResourceName']
-                logs_list.append((instance_id, log_type, log_time))
+                yield (instance_id, log_type, log_time)
+
+
+EVENT_NAMES = (
+    'StopInstances',
+    'StartInstances',
+    'RunInstances',
+    'TerminateInstances',
+)
+CLOUDTRAIL_DELIVERY_DELAY = timedelta(minutes=5)
+INITIAL_LOOKBACK = timedelta(minutes=10)  # 수집 위치가 없는 이벤트의 최초 수집 구간
+INGEST_OVERLAP = timedelta(minutes=10)  # 소유 정보가 늦게 적재된 인스턴스의 로그를 다시 수집하기 위한 중첩 구간
+MAX_LOOKBACK = timedelta(days=90)  # `lookup_events()`의 최대 조회 가능 기간
+INSERT_BATCH_SIZE = 1000
+
+
+def iter_log_file_records(
+    fileobj: BinaryIO,
+    chunk_size: int = 64 * 1024
+) -> Iterator[dict]:
+    '''gzip으로 압축된 CloudTrail 로그 파일(`{"Records": [...]}`)의 레코드를 하나씩 반환합니다.
+
+    압축 해제와 JSON 파싱을 `chunk_size` 단위로 진행하므로, 파일 전체를 메모리에 올리지 않습니다.
+    '''
+
+    decoder = json.JSONDecoder()
+
+    with io.TextIOWrapper(gzip.GzipFile(fileobj=fileobj), encoding='utf-8') as text:
+        buffer = ''
+
+        # `{"Records": [` 이전 부분은 건너뜀
+        while '[' not in buffer:
+            chunk = text.read(chunk_size)
+
+            if not chunk:
+                return
+
+            buffer += chunk
+
+        idx = buffer.index('[') + 1
+
+        while True:
+            while idx < len(buffer) and buffer[idx] in ' \t\r\n,':
+                idx += 1
+
+            if idx < len(buffer) and buffer[idx] == ']':
+                return
+
+            try:
+                record, idx = decoder.raw_decode(buffer, idx)
+            except json.JSONDecodeError:
+                # 레코드가 청크 경계에 걸친 경우
+                chunk = text.read(chunk_size)
+
+                if not chunk:
+                    if idx >= len(buffer):
+                        return
+
+                    raise
+
+                buffer = buffer[idx:] + chunk
+                idx = 0
+
+                continue
+
+            yield record
+
+
+def parsing_ec2_log_file_records(
+    records: Iterable[dict]
+) -> Iterator[tuple[str, str, datetime]]:
+    '''로그 파일의 레코드 중 성공한 EC2 시작/중지/생성/삭제 레코드에서 Instance ID, EventName, EventTime 정보만 추출합니다.'''
+
+    for record in records:
+        if record.get('eventSource') != 'ec2.amazonaws.com' \
+                or record.get('eventName') not in EVENT_NAMES \
+                or 'errorCode' in record:
+            continue
+
+        log_type = record['eventName']
+        log_time = datetime.strptime(
+            record['eventTime'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=pytz.utc)
+        instances_set = (record.get('responseElements') or {}).get('instancesSet') \
+            or (record.get('requestParameters') or {}).get('instancesSet') \
+            or {}
+
+        for item in instances_set.get('items', []):
+            if 'instanceId' in item:
+                yield (item['instanceId'], log_type, log_time)
+
+
+def iter_local_log_files(log_dir: str) -> Iterator[tuple[str, BinaryIO]]:
+    '''로컬 디렉토리(하위 디렉토리 포함)의 CloudTrail 로그 파일들을 이름순으로 반환합니다.'''
+
+    for path in sorted(Path(log_dir).rglob('*.json.gz')):
+        with open(path, 'rb') as f:
+            yield str(path), f
+
+
+def get_fetch_start_time(
+    fetched_until: Optional[datetime],
+    end_time: datetime,
+) -> datetime:
+    '''이벤트의 수집 위치를 바탕으로 로그 조회 시작 시간을 계산합니다.'''
+
+    if fetched_until is None:
+        return end_time - INITIAL_LOOKBACK
+
+    return max(fetched_until - INGEST_OVERLAP, end_time - MAX_LOOKBACK)
+
+
+def iter_fetched_events(
+    event_log_pages: Iterable[tuple[str, Optional[list[dict]]]],
+    failed_event_names: set[str],
+) -> Iterator[dict]:
+    '''페이지 단위로 조회된 이벤트를 하나씩 반환합니다.
+
+    조회에 실패한 event name은 `failed_event_names`에 추가됩니다.
+    '''
+
+    for event_name, events in event_log_pages:
+        if events is None:
+            failed_event_names.add(event_name)
+
+            continue
+
+        yield from events
+
+
+def iter_owned_instance_logs(
+    events: Iterable[dict],
+    instance_ids: set[str],
+) -> Iterator[tuple[str, str, datetime]]:
+    '''이벤트에서 소유 정보가 있는 인스턴스의 로그만 추출합니다.'''
+
+    for log in parsing_ec2_logs(events):
+        if log[0] in instance_ids:
+            yield log
+
+
+def insert_logs_in_batches(
+    psql_client,
+    logs: Iterable[tuple[str, str, datetime]],
+    batch_size: int = INSERT_BATCH_SIZE
+) -> Optional[tuple[int, int]]:
+    '''로그 스트림을 일정 크기의 배치 단위로 DB에 적재합니다.
 
-    return logs_list
+    이미 적재된 배치는 이후 조회나 적재에 실패하더라도 유지됩니다.
+
+    Returns:
+        `(적재된 행의 수, 중복으로 무시된 행의 수)`를 반환합니다. 적재 실패 시 None을 반환합니다.
+    '''
+
+    logs = iter(logs)
+    inserted_cnt, duplicated_cnt = 0, 0
+
+    while True:
+        batch = list(islice(logs, batch_size))
+
+        if not batch:
+            return inserted_cnt, duplicated_cnt
+
+        insert_result = psql_client.insert_into_cloudtrail_log(batch)
+
+        if insert_result is None:
+            return None
+
+        inserted_cnt += insert_result[0]
+        duplicated_cnt += insert_result[1]
+
+
+def ingest_log_files(
+    psql_client,
+    log_files: Iterable[tuple[str, BinaryIO]],
+    instance_ids: set[str]
+) -> Optional[tuple[int, int]]:
+    '''CloudTrail 로그 파일들에서 EC2 로그를 추출하여 DB에 적재합니다.
+
+    Returns:
+        `(적재된 행의 수, 중복으로 무시된 행의 수)`를 반환합니다. 적재 실패 시 None을 반환합니다.
+    '''
+
+    def iter_logs() -> Iterator[tuple[str, str, datetime]]:
+        for file_name, fileobj in log_files:
+            if 'CloudTrail-Digest' in file_name:  # 로그 무결성 검증용 파일
+                continue
+
+            logging.info('CloudTrail 로그 파일 처리 | %s', file_name)
+
+            yield from parsing_ec2_log_file_records(iter_log_file_records(fileobj))
+
+    logs_to_insert = (log for log in iter_logs() if log[0] in instance_ids)
+
+    return insert_logs_in_batches(psql_client, logs_to_insert)
+
+
+def parse_args() -> argparse.Namespace:
+    '''커맨드라인 인자를 파싱합니다.'''
+
+    parser = argparse.ArgumentParser()
+    source_group = parser.add_mutually_exclusive_group()
+    source_group.add_argument(
+        '--log-dir',
+        help='CloudTrail 로그 파일(*.json.gz)이 저장된 로컬 디렉토리')
+    source_group.add_argument(
+        '--s3-uri',
+        help='CloudTrail 로그 파일이 저장된 S3 경로 (예: s3://bucket/AWSLogs/.../2024/05/)')
+
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
-    from client.aws_client import CloudTrailClient
+    from client.aws_client import CloudTrailClient, S3Client
     from client.psql_client import PSQLClient
 
-    cloudtrail_client = CloudTrailClient()
+    args = parse_args()
     psql_client = PSQLClient()
-    end_time = datetime.now(pytz.utc)
-    start_time = end_time - timedelta(minutes=10)
-    logs_to_insert = []
-
-    stop_logs = cloudtrail_client.get_event_log_by_event_name(
-        'StopInstances',
-        start_time,
-        end_time
-    )
-    start_logs = cloudtrail_client.get_event_log_by_event_name(
-        'StartInstances',
-        start_time,
-        end_time
-    )
-    run_logs = cloudtrail_client.get_event_log_by_event_name(
-        'RunInstances',
-        start_time,
-        end_time
-    )
-    terminate_logs = cloudtrail_client.get_event_log_by_event_name(
-        'TerminateInstances',
-        start_time,
-        end_time
-    )
 
-    if (stop_logs and start_logs and run_logs) is None:
-        logging.error(
-            'AWS CloudTrail의 이벤트 조회 실패로 cron 작업이 비정상 종료됩니다.'
+    get_instance_in_db = psql_client.check_existed_instance_id()
+    intance_id_in_db = {instance_id[0] for instance_id in get_instance_in_db}
+
+    # 로그 파일 수집 모드
+    if args.log_dir or args.s3_uri:
+        if args.log_dir:
+            log_files = iter_local_log_files(args.log_dir)
+        else:
+            s3_uri = urlparse(args.s3_uri)
+            log_files = S3Client().iter_objects(
+                s3_uri.netloc,
+                s3_uri.path.lstrip('/'),
+                suffix='.json.gz'
+            )
+
+        insert_result = ingest_log_files(psql_client, log_files, intance_id_in_db)
+
+        if insert_result is None:
+            logging.error('CloudTrail 로그 파일 적재 중 DB 오류가 발생했습니다.')
+            sys.exit(1)
+
+        logging.info(
+            'CloudTrail 로그 파일 적재 성공 | 적재: %s건 | 중복: %s건',
+            *insert_result
         )
+        sys.exit(0)
+
+    cloudtrail_client = CloudTrailClient()
+    end_time = datetime.now(pytz.utc) - CLOUDTRAIL_DELIVERY_DELAY
+    failed_event_names = set()
+
+    watermarks = psql_client.get_cloudtrail_log_watermark(EVENT_NAMES)
+
+    if watermarks is None:
+        logging.error('CloudTrail 로그 수집 위치 조회 실패로 cron 작업이 비정상 종료됩니다.')
         sys.exit(1)
 
-    total_logs = stop_logs + start_logs + run_logs + terminate_logs
+    # 각 이벤트를 자신의 수집 위치부터 동시에 조회
+    event_start_times = {}
 
-    logs_to_insert_parsing = parsing_ec2_logs(total_logs)
+    for event_name in EVENT_NAMES:
+        start_time = get_fetch_start_time(watermarks.get(event_name), end_time)
 
-    get_instance_in_db = psql_client.check_existed_instance_id()
-    intance_id_in_db = [instance_id[0] for instance_id in get_instance_in_db]
+        if start_time < end_time:
+            event_start_times[event_name] = start_time
+
+    if not event_start_times:
+        logging.info('새로 수집할 AWS CloudTrail 로그 구간이 없습니다.')
+        sys.exit(0)
 
-    for log in logs_to_insert_parsing:
-        instance_id = log[0]
+    # 조회 -> 파싱 -> 필터링 -> 적재가 페이지 단위로 이어지는 스트림
+    events = iter_fetched_events(
+        cloudtrail_client.iter_event_log_pages_by_event_names(
+            event_start_times,
+            end_time
+        ),
+        failed_event_names
+    )
+    logs_to_insert = iter_owned_instance_logs(events, intance_id_in_db)
+    insert_result = insert_logs_in_batches(psql_client, logs_to_insert)
 
-        if instance_id in intance_id_in_db:
-            logs_to_insert.append(log)
+    if insert_result is None:
+        logging.error('AWS CloudTrail Log Data 적재 중 DB 오류가 발생했습니다.')
+        sys.exit(1)
 
+    # 오류 없이 조회와 적재를 마친 이벤트는 적재된 로그가 없더라도 수집 위치를 조회 구간의 끝으로 갱신
+    # (소유 정보가 늦게 적재된 인스턴스의 로그는 다음 실행에서 `INGEST_OVERLAP`만큼 다시 조회하여 수집)
+    psql_client.update_cloudtrail_log_watermark([
+        (event_name, end_time)
+        for event_name in event_start_times
+        if event_name not in failed_event_names
+    ])
 
-    if len(logs_to_insert) == 0:
-        logging.info(
-            'AWS CloudTrail Log Data 적재 실패 | `logs_to_insert`: %s', logs_to_insert)
+    if failed_event_names:
+        logging.error(
+            'AWS CloudTrail의 이벤트 조회 실패로 cron 작업이 비정상 종료됩니다. | %s',
+            failed_event_names
+        )
         sys.exit(1)
 
-    psql_client.insert_into_cloudtrail_log(logs_to_insert)
-    logging.info('AWS CloudTrail Log Data 적재 성공')
+    if insert_result[0] + insert_result[1] == 0:
+        logging.info('AWS CloudTrail Log Data 적재 실패 | 적재할 로그가 없습니다.')
+        sys.exit(1)
+
+    logging.info(
+        'AWS CloudTrail Log Data 적재 성공 | 적재: %s건 | 중복: %s건',
+        *insert_result
+    )
@@ -0,0 +1,53 @@
+'''전체 EC2 인스턴스의 정보를 조회하여 `instance_inventory` 테이블에 반영합니다.
+
+cron 작업을 통해 주기적으로 실행되며, 한 번의 (페이지 단위) `describe_instances()` 조회 결과를 COPY로 적재합니다.
+`AWS_MANAGER_INSTANCE_INVENTORY_SOURCE=db`로 설정된 경우, 사용자 소유 인스턴스 조회와 인스턴스 단속/중지 작업은
+AWS API 대신 이 테이블을 조회합니다.
+'''
+
+
+import os
+import logging
+import sys
+from datetime import datetime, timezone
+
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s',
+    handlers=[
+        logging.FileHandler('instance_inventory_snapshot.log', mode='a'),
+    ],
+)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+app_dir = os.path.abspath(os.path.join(current_dir, '..', '..'))
+
+sys.path.append(app_dir)
+
+
+if __name__ == '__main__':
+    from client.aws_client import EC2Client
+    from client.psql_client import PSQLClient
+
+    ec2_client = EC2Client()
+    psql_client = PSQLClient()
+
+    observed_at = datetime.now(timezone.utc)
+    instances = ec2_client.describe_inventory()
+
+    if instances is None:
+        logging.error('인스턴스 정보 조회 실패')
+        sys.exit(1)
+
+    upsert_result = psql_client.upsert_instance_inventory(instances, observed_at)
+
+    if upsert_result is None:
+        logging.error('인스턴스 정보 적재 실패')
+        sys.exit(1)
+
+    logging.info(
+        '인스턴스 정보 스냅샷 완료 | 인스턴스: %s개 | 반영: %s건 | 무시: %s건',
+        len(instances),
+        *upsert_result
+    )
@@ -85,7 +85,14 @@ if __name__ == "__main__":
             owner_logs_to_insert.append((owned_by, instance_id))
 
     if len(owner_logs_to_insert) != 0:
-        psql_client.insert_into_ownership_info(owner_logs_to_insert)
+        insert_result = psql_client.insert_into_ownership_info(
+            owner_logs_to_insert)
+
+        if insert_result is None:
+            logging.error('인스턴스 소유 데이터 적재 중 DB 오류가 발생했습니다.')
+            sys.exit(1)
+
         logging.info(
-            '인스턴스 소유 데이터 적재 성공'
+            '인스턴스 소유 데이터 적재 성공 | 적재: %s건 | 중복: %s건',
+            *insert_result
         )
\ No newline at end of file
@@ -27,7 +27,11 @@ if __name__ == "__main__":
     psql_client = PSQLClient()
     slack_client = SlackClient()
 
-    zero_quota_infos = psql_client.get_slack_id_and_instance_id_with_no_remaining_time()
+    if psql_client.use_instance_inventory:
+        # 실행 중인 인스턴스만 조회되므로 AWS API를 호출하지 않음
+        zero_quota_infos = psql_client.get_slack_id_and_running_instance_id_with_no_remaining_time()
+    else:
+        zero_quota_infos = psql_client.get_slack_id_and_instance_id_with_no_remaining_time()
 
     if zero_quota_infos is None:
         logging.error('DB 접근시 알수 없는 문제가 발생했습니다.')
@@ -37,28 +41,40 @@ if __name__ == "__main__":
         logging.info('종료할 인스턴스가 존재하지 않아 정상 종료됩니다.')
         sys.exit(0)
 
-    running_instances = ec2_client.get_live_instance_id_list(['running'])
+    if psql_client.use_instance_inventory:
+        running_instances = {info[1] for info in zero_quota_infos}
+    else:
+        running_instances = ec2_client.get_live_instance_id_set(['running'])
+
+    if running_instances is None:
+        logging.error('실행 중인 인스턴스 조회에 실패하여 실행을 종료합니다.')
+        sys.exit(1)
+
     stopped_instance_list = []
-    slack_id_to_alarm = set()
 
     for info in zero_quota_infos:
         instance_id = info[1]
-        slack_id = info[0]
 
         if instance_id in running_instances:
             stopped_instance_list.append(instance_id)
-            slack_id_to_alarm.add(slack_id)
 
     if len(stopped_instance_list) == 0:
         logging.info('중지 할 인스턴스가 없어서 실행을 종료합니다.')
         sys.exit(0)
 
-    if not ec2_client.stop_instance(stopped_instance_list):
-        logging.error('인스턴스 중지 시, 알 수 없는 문제가 발생하여 실행을 종료합니다.')
-        sys.exit(1)
+    stop_results = ec2_client.stop_instances(stopped_instance_list)
+    slack_id_to_alarm = {
+        slack_id
+        for slack_id, instance_id in zero_quota_infos
+        if instance_id in stop_results and stop_results[instance_id] is None
+    }
 
     for slack_id in slack_id_to_alarm:
         slack_client.app.client.chat_postMessage(
             channel=slack_id,
             text='오늘의 EC2 사용시간이 만료되어 소유하고 있는 모든 인스턴스가 자동 종료됩니다.'
         )
+
+    if any(stop_results.values()):
+        logging.error('일부 인스턴스 중지 시, 알 수 없는 문제가 발생했습니다. | %s', stop_results)
+        sys.exit(1)
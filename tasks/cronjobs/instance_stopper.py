@@ -20,20 +20,43 @@ sys.path.append(app_dir)
 
 if __name__ == '__main__':
     from client.aws_client import EC2Client
+    from client.psql_client import PSQLClient
 
     logging.info('인스턴스 중지 작업 시작 | %s',
                  datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
 
     ec2_client = EC2Client()
-    running_instances = ec2_client.get_live_instance_id_list(['running'])
+    psql_client = PSQLClient()
 
-    if not ec2_client.stop_instance(running_instances):
-        logging.error('인스턴스 중지 작업 실패 | %s',
+    if psql_client.use_instance_inventory:
+        running_instances = psql_client.get_inventory_instance_ids(['running'])
+    else:
+        running_instances = ec2_client.get_live_instance_id_set(['running'])
+
+    if running_instances is None:
+        logging.error('실행 중인 인스턴스 조회 실패 | %s',
                       datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
 
         sys.exit(1)
 
+    running_instances = sorted(running_instances)
+    stop_results = ec2_client.stop_instances(running_instances)
+
+    # 이미 중지되었거나 삭제된 인스턴스는 실패로 보지 않음
+    failed_instances = {
+        instance_id: error_code
+        for instance_id, error_code in stop_results.items()
+        if error_code not in (None, 'IncorrectInstanceState', 'InvalidInstanceID.NotFound')
+    }
+
     logging.info(
-        '인스턴스 중지 작업 완료 | %s | %s',
+        '인스턴스 중지 작업 완료 | %s | 중지: %s개 | 실패: %s개',
         datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        running_instances)
+        sum(error_code is None for error_code in stop_results.values()),
+        len(failed_instances)
+    )
+
+    if failed_instances:
+        logging.error('인스턴스 중지 작업 실패 | %s', failed_instances)
+
+        sys.exit(1)
@@ -1,13 +1,35 @@
 '''인스턴스 사용 할당량을 초기화 하거나 업데이트 하는 cronjob입니다.
 
 이 작업은 18시 05분부터 익일 08시 30분까지 5분 단위로 수행됩니다.
+
+모든 엔진은 인스턴스별 사용 구간을 만들어 사용자별로 겹치는 구간을 병합한 뒤,
+병합된 구간(= 사용 주기)마다 같은 보정 규칙으로 사용 시간을 차감합니다.
+따라서 여러 인스턴스를 동시에 사용한 시간은 한 번만 차감됩니다.
+
+기본(`full`) 엔진은 기존과 같이 매번 전날 18시부터의 로그를 모두 다시 계산합니다.
+`incremental` 엔진은 같은 규칙으로 계산하되, 사용자별 계산 상태(`ec2_usage_quota_state` 테이블)를 저장해두고 새로운 로그만 반영하므로,
+실행 비용이 그날 쌓인 로그의 양이 아닌 새로운 로그의 양에 비례합니다.
+`sql` 엔진은 같은 계산을 DB에서 window 함수로 수행하여 로그를 전송하지 않고 결과만 반영합니다.
+`numpy` 엔진은 같은 계산을 NumPy 배열 연산으로 수행하며, 로그가 많은 날에 사용합니다. (`numpy` 패키지 필요)
+
+할당량을 초기화하거나 업데이트한 뒤에는 인스턴스를 실행 중인 사용자별 할당량 소진 예정 시각(`quota_deadline` 테이블)을
+다시 계산하며, 소진 예정 시각에는 `tasks/quota_enforcer.py`가 인스턴스를 중지합니다.
+
+`--check-parity` 옵션을 주면 `full` 외의 엔진으로 업데이트한 뒤 `full` 엔진의 계산 결과와 같은지 확인하여 로깅합니다.
+
+Example:
+    $ python quota_updater.py
+    $ python quota_updater.py --engine incremental
+    $ python quota_updater.py --engine sql --check-parity
 '''
 
 
 import os
 import sys
 import logging
+import argparse
 from datetime import datetime, timedelta, time
+from typing import Iterable
 
 import holidays
 from pytz import timezone
@@ -62,154 +84,262 @@ def is_update_period(dt: datetime) -> bool:
     return False
 
 
-def get_user_data_model(
-    cloudtrail_log: list[tuple[int, str, datetime]],
-    today_maximum_quota: time
-) -> dict[int, dict[str, list[tuple[str, datetime]] | time]]:
-    '''사용자별 인스턴스 사용 데이터 모델을 생성합니다.'''
+def get_usage_quota(maximum_quota: time, usage_time: timedelta) -> time:
+    '''최대 할당량에서 사용 시간을 차감한 잔여 할당량을 반환합니다. 할당량을 초과한 경우 0을 반환하며, 초 미만은 버립니다.'''
 
-    user_data_model = {}
+    maximum_quota = timedelta(
+        hours=maximum_quota.hour, minutes=maximum_quota.minute, seconds=maximum_quota.second)
 
-    for log in cloudtrail_log:
-        iam_user_id, log_type, log_time = log
+    if usage_time >= maximum_quota:  # 할당량이 음수가 되는 경우 (= 할당량 초과)
+        return time.min
 
-        if iam_user_id not in user_data_model:
-            user_data_model[iam_user_id] = {
-                'logs': [(log_type, log_time)],
-                'usage_quota': today_maximum_quota
-            }
+    return (datetime.min + maximum_quota - usage_time).replace(microsecond=0).time()
 
-            continue
 
-        user_data_model[iam_user_id]['logs'].append((log_type, log_time))
+def update_usage_quota(
+    cloudtrail_log: list[tuple[int, str, str, datetime]],
+    now_dt: datetime,
+    maximum_quota: time
+) -> dict[int, time]:
+    '''사용자별 인스턴스 사용 로그를 분석하여 잔여 할당량을 계산합니다.
 
-    return user_data_model
+    인스턴스별 사용 구간을 사용자별로 병합한 뒤, 병합된 구간(= 사용 주기)마다 보정 규칙을 한 번씩 적용하여
+    사용 시간을 계산합니다. (`client.usage_intervals.calculate_user_usage_times()`)
 
+    Args:
+        cloudtrail_log: `PSQLClient.get_instance_cloudtrail_log()`가 반환한, 시간 순으로 정렬된 로그입니다.
+        now_dt: 잔여 할당량 계산의 기준 시각입니다.
+        maximum_quota: 오늘의 최대 할당량입니다.
 
-def calculate_usage_per_period(
-    start_time: datetime,
-    stop_time: datetime,
-    now_dt: datetime
-) -> time:
-    '''인스턴스 사용 주기에 따른 사용 시간을 계산합니다.'''
+    Returns:
+        `{iam_user_id: 잔여 할당량}` 형태로 반환합니다.
+    '''
 
-    KR_HOLIDAYS = holidays.country_holidays(  # pylint: disable=invalid-name
-        'KR', years=now_dt.year)
+    usage_times = calculate_user_usage_times(  # pylint: disable=used-before-assignment
+        cloudtrail_log, now_dt.replace(tzinfo=None))
 
-    # 시간 보정
-    if start_time.date() < now_dt.date():  # Case 1: 사용 주기가 전날 시작만 된 경우
-        start_time = time.min  # 00시
-    else:  # Case 2: 사용 주기가 오늘 시작되었고, 주기에 정규교육시간이 포함된 경우
-        if now_dt.weekday() < 5 and now_dt not in KR_HOLIDAYS:
-            if start_time.time() < time(8, 30):
-                if stop_time.time() >= time(8, 30):  # Case 2-1: 정규교육시간 전에 켜서 이후에 끄는 경우
-                    stop_time = stop_time.replace(hour=8, minute=30, second=0)
-            else:  # elif start_time.time() >= time(8, 30):
-                if start_time.time() < time(18, 0):
-                    return time.min  # Case 2-2: 정규교육시간 내에 사용한 경우
+    return {
+        iam_user_id: get_usage_quota(maximum_quota, usage_time)
+        for iam_user_id, usage_time in usage_times.items()
+    }
 
-    stop_time -= timedelta(hours=start_time.hour,
-                           minutes=start_time.minute, seconds=start_time.second)
 
-    return stop_time.time()
+def new_usage_quota_state() -> dict:
+    '''사용 로그가 반영되기 전의 사용자별 할당량 계산 상태를 생성합니다.'''
 
+    return {
+        'running_instance_ids': set(),  # 실행 중인 인스턴스
+        'period_start_time': None,  # 현재 사용 주기(= 병합된 사용 구간)의 시작 시각
+        'usage_time': timedelta(),  # 종료된 사용 주기들의 사용 시간
+    }
 
-def update_usage_quota(
-    user_data: dict[int, dict[str, list[tuple[str, datetime]] | time]],
+
+def fold_instance_logs(
+    state: dict,
+    logs: Iterable[tuple[str, str, datetime]],
     now_dt: datetime
-) -> None:
-    '''사용자별 인스턴스 사용 로그를 분석하여 잔여 할당량을 업데이트합니다.'''
+) -> dict:
+    '''사용자의 `(instance_id, log_type, log_time)` 로그를 시간 순서대로 할당량 계산 상태에 반영합니다.
 
-    for data_instance in user_data.items():
-        period_cnt = 0
-        start_time = None
-        usage_quota = data_instance[1]['usage_quota']  # Default hours
+    `update_usage_quota()`와 같이 이미 실행 중인 인스턴스의 Start 로그와 실행 중이 아닌 인스턴스의 Stop 로그는 무시하며,
+    실행 중인 인스턴스가 없어질 때 끝나는 사용 주기마다 보정 규칙을 한 번씩 적용합니다.
+    같은 날(`now_dt`) 안에서는 로그를 나누어 반영해도 결과가 같습니다.
+    '''
 
-        for log in data_instance[1]['logs']:  # Each log
-            log_type, log_time = log
+    running_instance_ids = state['running_instance_ids']
 
-            if log_type == 'StartInstances':
-                period_cnt += 1
-            elif log_type == 'StopInstances':
-                if period_cnt == 0:
-                    continue
+    for instance_id, log_type, log_time in logs:
+        if log_type == 'StartInstances':
+            if not running_instance_ids:
+                state['period_start_time'] = log_time
 
-                period_cnt -= 1
+            running_instance_ids.add(instance_id)
+        elif instance_id in running_instance_ids:
+            running_instance_ids.remove(instance_id)
 
-            if period_cnt >= 1:
-                if period_cnt == 1:
-                    if log_type != 'StopInstances':
-                        start_time = log_time
+            if not running_instance_ids:
+                state['usage_time'] += get_period_usage_time(  # pylint: disable=used-before-assignment
+                    (state['period_start_time'], log_time), now_dt)
+                state['period_start_time'] = None
 
-                continue
+    return state
 
-            # 인스턴스 사용 주기에 확인 -> 시간 계산
-            if log_time.date() < now_dt.date():  # 사용 주기가 전날 이루어진 경우
-                continue
 
-            usage_time = calculate_usage_per_period(
-                start_time, log_time, now_dt)
+def get_current_usage_time(state: dict, now_dt: datetime) -> timedelta:
+    '''할당량 계산 상태에 아직 종료되지 않은 사용 주기를 반영하여, 현재 시각 기준의 사용 시간을 반환합니다.'''
 
-            # 사용 시간 차감 및 잔여 할당량 계산
-            usage_quota = datetime.combine(datetime.min, usage_quota)
+    if state['running_instance_ids']:
+        return state['usage_time'] + get_period_usage_time(
+            (state['period_start_time'], now_dt), now_dt)
 
-            try:
-                usage_quota -= timedelta(hours=usage_time.hour,
-                                         minutes=usage_time.minute, seconds=usage_time.second)
-                usage_quota = usage_quota.time()
-            except OverflowError:  # 할당량이 음수가 되는 경우
-                usage_quota = time.min
+    return state['usage_time']
 
-                break
 
-        # 인스턴스 사용 주기가 없는 경우 (= 아직 사용을 중지하지 않은 사용자)
-        if period_cnt >= 1:
-            usage_time = calculate_usage_per_period(
-                start_time, now_dt, now_dt)  # 현재시간 기준 계산
+def update_usage_quota_incrementally(
+    psql_client,
+    now_dt: datetime,
+    todays_maximum_quota: time,
+    settle_horizon: timedelta
+) -> bool:
+    '''저장된 사용자별 할당량 계산 상태에 새로운 CloudTrail 로그만 반영하여 잔여 할당량을 업데이트합니다.
 
-            # 사용 시간 차감 및 잔여 할당량 계산
-            usage_quota = datetime.combine(datetime.min, usage_quota)
+    CloudTrail 로그는 늦게 적재될 수 있으므로, `settle_horizon` 이전의 로그만 상태에 반영하여 저장합니다.
+    그 이후의 로그는 매 실행마다 저장된 상태 위에 다시 반영하여 현재 잔여 할당량만 계산합니다.
+    오늘 날짜의 상태가 없다면(e.g. 자정 이후 첫 실행) 전날 18시부터의 로그로 상태를 새로 만듭니다.
+    '''
 
-            try:
-                usage_quota -= timedelta(hours=usage_time.hour,
-                                         minutes=usage_time.minute, seconds=usage_time.second)
-                usage_quota = usage_quota.time()
-            except OverflowError:  # 할당량이 음수가 되는 경우 (= 할당량 초과)
-                usage_quota = time.min
+    quota_date = now_dt.date()
+    settled_until = (now_dt - settle_horizon).replace(tzinfo=None)
+    states = psql_client.get_usage_quota_states(quota_date)
 
-        data_instance[1]['usage_quota'] = usage_quota
+    if states is None:
+        logging.error('인스턴스 사용 할당량 계산 상태 조회 실패 | `quota_date`: %s', quota_date)
 
+        return False
 
-def main() -> bool:
-    '''인스턴스 사용 할당량을 초기화하거나 업데이트하는 작업을 수행하는 main 함수입니다.'''
+    states = {
+        iam_user_id: {
+            'running_instance_ids': set(running_instance_ids),
+            'period_start_time': period_start_time,
+            'usage_time': usage_time,
+            'processed_until': processed_until,
+        }
+        for iam_user_id, (running_instance_ids, period_start_time, usage_time, processed_until) in states.items()
+    }
+
+    # 마지막으로 반영된 이후의 로그만 조회
+    if states:
+        log_range_start_time = min(state['processed_until'] for state in states.values())
+    else:
+        log_range_start_time = (now_dt - timedelta(days=1)).replace(
+            hour=18, minute=0, second=0, microsecond=0)
+
+    cloudtrail_log = psql_client.get_instance_cloudtrail_log(
+        range_start_time=log_range_start_time,
+        range_end_time=now_dt)
 
-    now_dt = datetime.now(timezone('Asia/Seoul'))
-    todays_maximum_quota = get_todays_maxinum_quota(now_dt)
-    psql_client = PSQLClient()  # pylint: disable=used-before-assignment
-    KR_HOLIDAYS = holidays.country_holidays(  # pylint: disable=invalid-name
-        'KR', years=now_dt.year)
+    if cloudtrail_log is None:
+        logging.error('CloudTrail 로그 조회 실패 | %s ~ %s', log_range_start_time, now_dt)
+
+        return False
+
+    user_logs = {}
+
+    for iam_user_id, instance_id, log_type, log_time in cloudtrail_log:
+        user_logs.setdefault(iam_user_id, []).append((instance_id, log_type, log_time))
+
+    now = now_dt.replace(tzinfo=None)
+    usage_quotas = []
+
+    for iam_user_id in states.keys() | user_logs.keys():
+        state = states.setdefault(iam_user_id, {
+            **new_usage_quota_state(),
+            'processed_until': None,
+        })
+        processed_until = state['processed_until']
+        logs = [
+            log for log in user_logs.get(iam_user_id, [])
+            if processed_until is None or log[2] > processed_until  # 이미 반영된 로그는 제외
+        ]
+
+        fold_instance_logs(state, (log for log in logs if log[2] <= settled_until), now)
+        state['processed_until'] = max(settled_until, processed_until or settled_until)
+
+        # 아직 늦게 적재될 수 있는 로그는 상태를 복사하여 반영
+        current_state = fold_instance_logs(
+            {**state, 'running_instance_ids': set(state['running_instance_ids'])},
+            (log for log in logs if log[2] > state['processed_until']),
+            now
+        )
+        usage_quotas.append((
+            iam_user_id,
+            get_usage_quota(todays_maximum_quota, get_current_usage_time(current_state, now))
+        ))
+
+    if psql_client.upsert_usage_quota_states(
+        quota_date,
+        (
+            (
+                iam_user_id,
+                sorted(state['running_instance_ids']),
+                state['period_start_time'],
+                state['usage_time'],
+                state['processed_until'],
+            )
+            for iam_user_id, state in states.items()
+        )
+    ) is None:
+        return False
+
+    if psql_client.bulk_update_ec2_usage_quota(usage_quotas) is None:
+        return False
+
+    logging.info(
+        '사용자별 인스턴스 사용량 업데이트 (incremental) | 조회된 로그: %s개 | 사용자: %s명 | 반영 기준 시각: %s',
+        len(cloudtrail_log),
+        len(usage_quotas),
+        settled_until
+    )
+
+    return True
+
+
+def parse_args() -> argparse.Namespace:
+    '''커맨드라인 인자를 파싱합니다.'''
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument(
+        '--engine', choices=['full', 'incremental', 'sql', 'numpy'], default='full',
+        help='full: 전날 18시부터의 로그를 모두 다시 계산 (기본값), incremental: 새로운 로그만 반영, '
+             'sql: full과 같은 계산을 DB에서 수행, numpy: full과 같은 계산을 NumPy 배열 연산으로 수행')
+    parser.add_argument(
+        '--settle-minutes', type=float, default=15,
+        help='로그가 늦게 적재될 수 있는 시간(분) (기본값: 15)')
+    parser.add_argument(
+        '--check-parity', action='store_true',
+        help='full 외의 엔진으로 업데이트한 뒤, full 엔진의 계산 결과와 같은지 확인')
+
+    return parser.parse_args()
+
+
+def update_usage_quota_with_engine(
+    args: argparse.Namespace,
+    psql_client,
+    now_dt: datetime,
+    todays_maximum_quota: time,
+    log_range_start_time: datetime
+) -> bool:
+    '''선택한 엔진으로 사용자별 잔여 인스턴스 사용 할당량을 업데이트합니다.'''
+
+    if args.engine == 'incremental':
+        return update_usage_quota_incrementally(
+            psql_client,
+            now_dt,
+            todays_maximum_quota,
+            settle_horizon=timedelta(minutes=args.settle_minutes)
+        )
+
+    if args.engine == 'sql':
+        updated_cnt = psql_client.update_ec2_usage_quota_from_log(
+            log_range_start_time,
+            now_dt,
+            todays_maximum_quota,
+            education_window=get_education_window(  # pylint: disable=used-before-assignment
+                now_dt.replace(tzinfo=None))
+        )
+
+        if updated_cnt is None:
+            return False
 
-    # 인스턴스 사용량 초기화
-    if is_midnight(now_dt):
-        psql_client.reset_usage_quota(todays_maximum_quota)
         logging.info(
-            '인스턴스 사용량 초기화 작업 진행 | `now_dt`: %s | `todays_maximum_quota`: %s ',
+            '사용자별 인스턴스 사용량 업데이트 (sql) | `now_dt`: %s | 사용자: %s명',
             now_dt.strftime('%Y-%m-%d %H:%M:%S'),
-            todays_maximum_quota
+            updated_cnt
         )
 
-        return True  # 초기화 작업 완료
-
-    # 인스턴스 사용량 업데이트
-    if not is_update_period(now_dt):
-        if now_dt.weekday() < 5 and now_dt not in KR_HOLIDAYS:
-            return False  # 평일 정규교육시간인 경우 사용량 업데이트 스킵
+        return True
 
-    # CloudTrail 로그 조회
-    yesterday_dt = now_dt - timedelta(days=1)
-    log_range_start_time = yesterday_dt.replace(
-        hour=18, minute=0, second=0, microsecond=0)
-    cloudtrail_log = psql_client.get_cloudtrail_log(
+    cloudtrail_log = psql_client.get_instance_cloudtrail_log(
         range_start_time=log_range_start_time,
         range_end_time=now_dt)
 
@@ -222,19 +352,20 @@ def main() -> bool:
 
         return False
 
-    # 사용자별 데이터 모델 생성
-    user_data_model = get_user_data_model(
-        cloudtrail_log,
-        todays_maximum_quota
-    )
-
     # 사용자별 인스턴스 사용량 업데이트
-    update_usage_quota(user_data_model, now_dt)
+    if args.engine == 'numpy':
+        # numpy 패키지는 이 엔진에서만 필요하므로 필요할 때 import
+        from client.usage_quota_vectorized import calculate_usage_quota_vectorized  # pylint: disable=import-outside-toplevel
+
+        usage_quotas = calculate_usage_quota_vectorized(cloudtrail_log, now_dt, todays_maximum_quota)
+    else:
+        usage_quotas = update_usage_quota(cloudtrail_log, now_dt, todays_maximum_quota)
 
     # 업데이트된 사용량을 데이터베이스에 반영(적재)
-    psql_client.update_ec2_usage_quota(user_data_model)
+    psql_client.bulk_update_ec2_usage_quota(usage_quotas.items())
     logging.info(
-        '사용자별 인스턴스 사용량 업데이트 작업 진행 | `now_dt`: %s | `todays_maximum_quota`: %s ',
+        '사용자별 인스턴스 사용량 업데이트 작업 진행 (%s) | `now_dt`: %s | `todays_maximum_quota`: %s ',
+        args.engine,
         now_dt.strftime('%Y-%m-%d %H:%M:%S'),
         todays_maximum_quota
     )
@@ -242,8 +373,167 @@ def main() -> bool:
     return True
 
 
+def check_engine_parity(
+    engine: str,
+    psql_client,
+    now_dt: datetime,
+    todays_maximum_quota: time,
+    log_range_start_time: datetime
+) -> bool:
+    '''`engine`으로 반영한 사용자별 잔여 할당량이 `full` 엔진의 계산 결과와 같은지 확인합니다.
+
+    결과가 다른 사용자가 있다면 `(engine의 결과, full 엔진의 결과)`를 로깅하고 False를 반환합니다.
+    '''
+
+    cloudtrail_log = psql_client.get_instance_cloudtrail_log(
+        range_start_time=log_range_start_time,
+        range_end_time=now_dt)
+    remaining_times = psql_client.get_all_remaining_usage_times()
+
+    if cloudtrail_log is None or remaining_times is None:
+        logging.error('엔진 계산 결과 비교를 위한 조회 실패 | `engine`: %s', engine)
+
+        return False
+
+    remaining_times = dict(remaining_times)
+    usage_quotas = update_usage_quota(cloudtrail_log, now_dt, todays_maximum_quota)
+    mismatches = {
+        iam_user_id: (remaining_times[iam_user_id], usage_quota)
+        for iam_user_id, usage_quota in usage_quotas.items()
+        if iam_user_id in remaining_times and remaining_times[iam_user_id] != usage_quota
+    }
+
+    if mismatches:
+        logging.error(
+            '엔진 계산 결과 불일치 | `engine`: %s | 사용자: %s명 | `(%s, full)`: %s',
+            engine,
+            len(mismatches),
+            engine,
+            mismatches
+        )
+
+        return False
+
+    logging.info('엔진 계산 결과 일치 | `engine`: %s | 사용자: %s명', engine, len(usage_quotas))
+
+    return True
+
+
+def update_quota_deadlines(
+    psql_client,
+    now_dt: datetime,
+    log_range_start_time: datetime,
+    settle_horizon: timedelta
+) -> bool:
+    '''업데이트된 잔여 할당량으로 인스턴스를 실행 중인 사용자들의 할당량 소진 예정 시각을 다시 계산하여 반영합니다.
+
+    소진 예정 시각이 되면 `tasks/quota_enforcer.py`가 사용자의 인스턴스를 중지합니다.
+    '''
+
+    cloudtrail_log = psql_client.get_instance_cloudtrail_log(
+        range_start_time=log_range_start_time,
+        range_end_time=now_dt)
+    remaining_times = psql_client.get_all_remaining_usage_times()
+
+    if cloudtrail_log is None or remaining_times is None:
+        logging.error('실행 중인 사용자의 잔여 할당량 조회 실패')
+
+        return False
+
+    # 사용 주기의 시작 시각에 따라 정규교육시간에 할당량이 차감되는지가 달라지므로, 사용 주기의 시작 시각도 함께 계산
+    remaining_times = dict(remaining_times)
+    period_start_times = get_running_period_start_times(cloudtrail_log)  # pylint: disable=used-before-assignment
+    deadlines = [
+        (
+            iam_user_id,
+            get_quota_deadline(  # pylint: disable=used-before-assignment
+                now_dt, remaining_times[iam_user_id], period_start_time)
+        )
+        for iam_user_id, period_start_time in period_start_times.items()
+        if iam_user_id in remaining_times
+    ]
+
+    if psql_client.sync_quota_deadlines(deadlines, settle_horizon) is None:
+        return False
+
+    logging.info(
+        '할당량 소진 예정 시각 업데이트 | `now_dt`: %s | 실행 중인 사용자: %s명 | 오늘 소진 예정: %s명',
+        now_dt.strftime('%Y-%m-%d %H:%M:%S'),
+        len(deadlines),
+        sum(deadline is not None for _, deadline in deadlines)
+    )
+
+    return True
+
+
+def main() -> bool:
+    '''인스턴스 사용 할당량을 초기화하거나 업데이트하는 작업을 수행하는 main 함수입니다.
+
+    할당량을 초기화하거나 업데이트한 뒤에는 사용자별 할당량 소진 예정 시각도 다시 계산합니다.
+    '''
+
+    args = parse_args()
+
+    now_dt = datetime.now(timezone('Asia/Seoul'))
+    todays_maximum_quota = get_todays_maxinum_quota(now_dt)
+    psql_client = PSQLClient()  # pylint: disable=used-before-assignment
+    KR_HOLIDAYS = holidays.country_holidays(  # pylint: disable=invalid-name
+        'KR', years=now_dt.year)
+    is_education_day = now_dt.weekday() < 5 and now_dt not in KR_HOLIDAYS
+
+    # CloudTrail 로그 조회 범위
+    yesterday_dt = now_dt - timedelta(days=1)
+    log_range_start_time = yesterday_dt.replace(
+        hour=18, minute=0, second=0, microsecond=0)
+
+    # 인스턴스 사용량 초기화
+    if is_midnight(now_dt):
+        psql_client.reset_usage_quota(todays_maximum_quota)
+        logging.info(
+            '인스턴스 사용량 초기화 작업 진행 | `now_dt`: %s | `todays_maximum_quota`: %s ',
+            now_dt.strftime('%Y-%m-%d %H:%M:%S'),
+            todays_maximum_quota
+        )
+    else:
+        # 인스턴스 사용량 업데이트
+        if not is_update_period(now_dt) and is_education_day:
+            return False  # 평일 정규교육시간인 경우 사용량 업데이트 스킵
+
+        if not update_usage_quota_with_engine(
+            args,
+            psql_client,
+            now_dt,
+            todays_maximum_quota,
+            log_range_start_time
+        ):
+            return False
+
+        if args.check_parity and args.engine != 'full':
+            check_engine_parity(
+                args.engine,
+                psql_client,
+                now_dt,
+                todays_maximum_quota,
+                log_range_start_time
+            )
+
+    return update_quota_deadlines(
+        psql_client,
+        now_dt,
+        log_range_start_time,
+        settle_horizon=timedelta(minutes=args.settle_minutes)
+    )
+
+
 if __name__ == '__main__':
     from client.psql_client import PSQLClient
+    from client.usage_intervals import (
+        calculate_user_usage_times,
+        get_education_window,
+        get_period_usage_time,
+        get_quota_deadline,
+        get_running_period_start_times,
+    )
 
     # 함수 실행 및 로깅
     if not main():
@@ -0,0 +1,184 @@
+'''인스턴스 사용 할당량 소진 예정 시각에 맞춰 인스턴스를 중지하는 상주 프로세스입니다.
+
+`/start` 요청과 할당량 업데이트(`tasks/cronjobs/quota_updater.py`) 시 저장되는 사용자별 할당량 소진 예정 시각
+(`quota_deadline` 테이블)을 가장 가까운 시각부터 조회하여, 소진 예정 시각이 되면 즉시 인스턴스를 중지합니다.
+소진 예정 시각 `--warn-minutes`분 전에는 사용자에게 미리 안내합니다.
+
+다음 안내/중지 시각까지 대기하되, 그 사이 새로 저장된 소진 예정 시각도 반영할 수 있도록 최대 `--max-sleep`초마다 다시 조회합니다.
+기존 단속 작업(`tasks/cronjobs/instance_police.py`)은 이 프로세스가 중단된 경우를 대비하여 그대로 둡니다.
+
+Example:
+    $ python quota_enforcer.py --warn-minutes 5
+'''
+
+
+import os
+import sys
+import time
+import logging
+import argparse
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pytz import timezone
+
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s',
+    handlers=[logging.FileHandler('quota_enforcer.log', mode='a')]
+)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+app_dir = os.path.abspath(os.path.join(current_dir, '..'))
+
+sys.path.append(app_dir)
+
+KST = timezone('Asia/Seoul')
+
+# 인스턴스 중지에 실패한 경우 다시 시도하기까지의 시간
+RETRY_INTERVAL = timedelta(seconds=10)
+
+
+def needs_warning(deadline: datetime, warned_at: Optional[datetime], warn_lead: timedelta) -> bool:
+    '''소진 예정 시각에 대한 사전 안내가 필요한지 확인합니다.
+
+    안내 이후 소진 예정 시각이 `warn_lead` 이상 늦춰졌다면(e.g. 할당량 업데이트) 다시 안내합니다.
+    '''
+
+    return warned_at is None or warned_at < deadline - 2 * warn_lead
+
+
+def stop_user_instances(
+    ec2_client,
+    slack_client,
+    slack_id: str,
+    instance_ids: list[str]
+) -> bool:
+    '''할당량을 모두 사용한 사용자의 실행 중인 인스턴스를 중지합니다. 모든 인스턴스가 중지되었다면 True를 반환합니다.
+
+    소유 정보에 남아 있는 종료된(= 존재하지 않는) 인스턴스는 조회 결과에서 제외되므로 중지 대상에서도 제외됩니다.
+    '''
+
+    running_instances = ec2_client.find_instances(instance_ids, states=['pending', 'running'])
+
+    if running_instances is None:
+        logging.error('인스턴스 상태 조회 실패 | 인스턴스 ID: %s', instance_ids)
+
+        return False
+
+    running_instance_ids = sorted(running_instances)
+
+    if not running_instance_ids:
+        return True
+
+    stop_results = ec2_client.stop_instances(running_instance_ids)
+    failed_results = {i: error_code for i, error_code in stop_results.items() if error_code}
+
+    if failed_results:
+        logging.error('할당량 소진 인스턴스 중지 실패 | %s', failed_results)
+
+        return False
+
+    slack_client.send_dm(
+        slack_id, '오늘의 EC2 사용시간이 만료되어 소유하고 있는 모든 인스턴스가 자동 종료됩니다.')
+    logging.info('할당량 소진 인스턴스 중지 | 슬랙 ID: %s | 인스턴스 ID: %s', slack_id, running_instance_ids)
+
+    return True
+
+
+def enforce_quota_deadlines(
+    ec2_client,
+    psql_client,
+    slack_client,
+    now_dt: datetime,
+    warn_lead: timedelta,
+    max_sleep: timedelta
+) -> datetime:
+    '''소진 예정 시각이 지난 사용자의 인스턴스를 중지하고, 소진이 임박한 사용자에게 안내합니다.
+
+    Returns:
+        다음으로 안내하거나 인스턴스를 중지해야 하는 시각(최대 `now_dt + max_sleep`)을 반환합니다.
+    '''
+
+    next_wake_time = now_dt + max_sleep
+    deadlines = psql_client.get_quota_deadlines_before(next_wake_time + warn_lead)
+
+    if deadlines is None:
+        logging.error('할당량 소진 예정 시각 조회 실패')
+
+        return next_wake_time
+
+    for iam_user_id, slack_id, deadline, warned_at, instance_ids in deadlines:
+        if deadline <= now_dt:
+            if stop_user_instances(ec2_client, slack_client, slack_id, instance_ids):
+                psql_client.delete_quota_deadline(iam_user_id, deadline)
+            else:
+                next_wake_time = min(next_wake_time, now_dt + RETRY_INTERVAL)
+
+            continue
+
+        next_wake_time = min(next_wake_time, deadline)
+
+        if not needs_warning(deadline, warned_at, warn_lead):
+            continue
+
+        if deadline - warn_lead > now_dt:
+            next_wake_time = min(next_wake_time, deadline - warn_lead)
+
+            continue
+
+        remaining_minutes = (deadline - now_dt) // timedelta(minutes=1)
+        slack_client.send_dm(
+            slack_id,
+            f'''\
+오늘의 EC2 사용시간이 약 {remaining_minutes}분 남았습니다 ⏰
+`{deadline.astimezone(KST).strftime('%H:%M:%S')}`에 소유하고 있는 모든 인스턴스가 자동 종료되니, 작업 내용을 미리 저장해주세요.\
+'''
+        )
+        psql_client.mark_quota_deadline_warned(iam_user_id, deadline)
+        logging.info('할당량 소진 사전 안내 | 슬랙 ID: %s | 소진 예정 시각: %s', slack_id, deadline)
+
+    return next_wake_time
+
+
+def parse_args() -> argparse.Namespace:
+    '''커맨드라인 인자를 파싱합니다.'''
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument(
+        '--warn-minutes', type=float, default=5,
+        help='소진 예정 시각 몇 분 전에 사용자에게 안내할지 (기본값: 5)')
+    parser.add_argument(
+        '--max-sleep', type=float, default=15,
+        help='소진 예정 시각을 다시 조회하기까지 최대 대기 시간(초) (기본값: 15)')
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    from client.aws_client import EC2Client
+    from client.psql_client import PSQLClient
+    from client.slack_client import SlackClient
+
+    args = parse_args()
+    warn_lead = timedelta(minutes=args.warn_minutes)
+    max_sleep = timedelta(seconds=args.max_sleep)
+
+    ec2_client = EC2Client()
+    psql_client = PSQLClient()
+    slack_client = SlackClient()
+
+    logging.info('할당량 소진 단속 시작 | 사전 안내: %s분 전', args.warn_minutes)
+
+    while True:
+        next_wake_time = enforce_quota_deadlines(
+            ec2_client,
+            psql_client,
+            slack_client,
+            datetime.now(KST),
+            warn_lead,
+            max_sleep
+        )
+
+        time.sleep(max(0, (next_wake_time - datetime.now(KST)).total_seconds()))